@@ -42,10 +42,10 @@ class ImageProcess:
                 THRESHOLD2 = 150
     class ContourArea:
         class ImageRoi:
-            POSITION_THRESHOLD = 500
-            SIZE_THRESHOLD = 200
-            MIN_AREA_THRESHOLD = 2000000
-            MAX_AREA_THRESHOLD = 3000000
+            POSITION_THRESHOLD = 40
+            SIZE_THRESHOLD = 16
+            MIN_AREA_THRESHOLD = 12800
+            MAX_AREA_THRESHOLD = 19200
             MIN_ASPECT_RATIO = 2.4
             MAX_ASPECT_RATIO = 2.6
         class PassportBox:
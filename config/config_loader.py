@@ -1,5 +1,7 @@
+import os
 import yaml
 import json
+import threading
 from pathlib import Path
 from src.enums.enum_factory import EnumFactory
 from src.decorator.class_decorator import singleton
@@ -22,6 +24,10 @@ class ConfigLoader:
     ):
         self.config_dir = config_dir
         self.output_file = output_file
+        # Resources read on the hot path, keyed by (path, build), with the
+        # file mtime they were loaded from
+        self._resources = {}
+        self._resources_lock = threading.Lock()
 
     def update_enum(self):
         EnumFactory.generate_enum_code(
@@ -33,6 +39,34 @@ class ConfigLoader:
             data = json.load(file)
         return data
 
+    def load_yaml(self, file_path: Path):
+        with open(file_path, "r", encoding='utf-8') as file:
+            data = yaml.safe_load(file)
+        return data
+
+    def load_resource(self, file_path: Path, build=None):
+        """
+        Returns a JSON or YAML file, turned into whatever `build` returns
+        for it (a lookup table, a compiled engine...), loaded once per
+        process and again only when the file's mtime changes. The result
+        is shared, callers must not modify it.
+        """
+        key = (str(file_path), build)
+        mtime = os.stat(file_path).st_mtime_ns
+        with self._resources_lock:
+            cached = self._resources.get(key)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+            if Path(file_path).suffix in (".yml", ".yaml"):
+                resource = self.load_yaml(file_path)
+            else:
+                resource = self.load_json(file_path)
+            if build is not None:
+                resource = build(resource)
+            self._resources[key] = (mtime, resource)
+            return resource
+
 
 def _config_loader():
     return ConfigLoader(
@@ -52,5 +86,10 @@ def load_json(filePath: Path):
     return _config_loader().load_json(filePath)
 
 
+def load_resource(filePath: Path, build=None):
+    # Load a config file read on every card, cached until it changes
+    return _config_loader().load_resource(filePath, build=build)
+
+
 def test_enum():
     print(ImageProcess.Counters.ImageRoi.MODE)
@@ -8,7 +8,9 @@ ROOT_DIR = Path(__file__).resolve().parent.parent
 CONFIG_DIR = Path(__file__).resolve().parent
 CONFIG_FILES_DIR = CONFIG_DIR / "config_files"
 OCR_CORRECTIONS_PATH = CONFIG_FILES_DIR / "ocr_corrections.json"
+FIELD_TEMPLATE_PATH = CONFIG_FILES_DIR / "field_template.json"
 HIN_ENG_DIGITS_PATH = CONFIG_FILES_DIR / "hin_eng_digits.json"
+FIELD_LABELS_PATH = CONFIG_FILES_DIR / "field_labels.json"
 CONFIG_FILE_PATH = CONFIG_FILES_DIR / "config.py"
 DATA_DIR = ROOT_DIR / "data"
 SRC_DIR = ROOT_DIR / "src"
@@ -17,18 +19,45 @@ ROI_PATH = TEMP_IMG_DIR / "roi"
 PDF_DIR = DATA_DIR / "pdfs"
 PDF_OUTPUT_PATH = DATA_DIR / "pdf_output"
 LOGS_DIR = ROOT_DIR / "logs"
+CACHE_DIR = ROOT_DIR / ".cache"
+RENDER_CACHE_DIR = CACHE_DIR / "render"
+LAYOUT_TEMPLATE_DIR = CACHE_DIR / "layout"
+OCR_CACHE_DIR = CACHE_DIR / "ocr"
 UTILS_DIR = SRC_DIR / "utils"
 PDF_PATH = PDF_DIR / "2024-FC-EROLLGEN-S04-196-FinalRoll-Revision5-HIN-1.pdf"
 
 
 # PDF Process Control Settings
 PDF_PROCESS_CONTROL = 8
+# Execution mode: "pdf" runs one process per PDF and walks its pages
+# sequentially, "page" takes PDFs one at a time and fans the pages of each
+# PDF out to PAGE_PROCESS_CONTROL workers
+PDF_EXECUTION_MODE = "pdf"
+PAGE_PROCESS_CONTROL = 8
 # Pattern Settings
 VOTER_ID_PATTERN = r"\b([A-Z]{2}/\d{2}/\d{3}/\d{6})|([A-Z]{3}\d{7})\b"
 GENDER_AGE_PATTERN = r"(उम्र)\s*:*\s*(\d+)\s*([^\s]+)\s*:*\s*:*\s*(\S+)|([^\s]+)\s*:*\s*(\d+)\s*(लिंग)\s*:*\s*:*\s*(\S+)"
 # GENDER_AGE_PATTERN_REPLACEMENT = r"\1:\2\nलिंग:\4"
 VOTER_NAME_FIELD_DETECT_PATTERN = r'^(.+)\s+का\s+(.+)$'
 MAKAN_NUMBER_FIELD_DETECT_PATTERN = r'^(?:.*?मकान.*?|.*?संख्या.*?)$'
+# Card text is post-processed by the fused TextPipeline: compiled patterns
+# and one pass over the lines. False runs the TextProcessor decorator
+# stack, which gives the same output
+USE_FUSED_TEXT_PIPELINE = True
+# Label resolver: every field key read from a card is mapped to its field
+# by edit distance to the known labels in field_labels.json, so OCR'd
+# label misspellings need no entry in ocr_corrections.json. Fused text
+# pipeline only
+USE_LABEL_RESOLVER = False
+# Largest edit distance accepted, as a share of the label length (labels
+# shorter than 1 / ratio must match exactly)
+LABEL_MAX_DISTANCE_RATIO = 0.25
+# Resolved labels memoized per process
+LABEL_RESOLVER_CACHE_SIZE = 4096
+# Batched text processing: the OCR text of the cards is kept raw while the
+# pages are read, and every card of the PDF is post-processed at once by
+# BatchTextProcessor, in the main process, after all image work is done
+USE_BATCHED_TEXT_PROCESSING = False
 
 # Image Settings
 IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
@@ -37,7 +66,171 @@ NUM_SECTION = 2
 
 # PDF Settings
 IMAGE_DPI = 900
-IMAGE_MODE = "RGB"
+# Color mode of rendered pages: "gray" renders a single channel straight
+# from the PDF, "rgb" renders color (used for passport photos only)
+IMAGE_COLOR_MODE = "gray"
+POINTS_PER_INCH = 72
+# Render mode: "full_page" renders every page at IMAGE_DPI, "two_pass"
+# detects card ROIs on a ROI_DETECTION_DPI render and re-renders only the
+# card clips at IMAGE_DPI
+PDF_RENDER_MODE = "full_page"
+ROI_DETECTION_DPI = 120
+# ROI source: "vector" reads card rectangles from the page drawings,
+# "raster" detects them on a rendered page, "auto" tries the drawings first
+# and falls back to raster detection on pages without them (scanned PDFs)
+ROI_SOURCE = "auto"
+# Duplicate ROI suppression: "threshold" drops a rectangle whose position
+# and size are within the contour_area thresholds of a kept one, "iou"
+# drops it when its overlap with a kept one reaches ROI_NMS_IOU_THRESHOLD
+ROI_NMS_MODE = "threshold"
+ROI_NMS_IOU_THRESHOLD = 0.5
+# Take passport photos from the images embedded in the PDF, falling back to
+# contour detection on the card for cards without one
+USE_EMBEDDED_PHOTOS = True
+# Text layer settings: pages whose embedded text passes the probe are read
+# from the PDF instead of being OCR'd
+USE_TEXT_LAYER = True
+TEXT_LAYER_MIN_CHARS = 100
+# Share of characters that must be Devanagari, ASCII or whitespace
+TEXT_LAYER_MIN_VALID_RATIO = 0.98
+# Share of letters that must be Devanagari (the rolls are in Hindi)
+TEXT_LAYER_MIN_DEVANAGARI_RATIO = 0.2
+# Share of Devanagari words allowed to start with a vowel sign or virama,
+# which happens when a font maps its glyphs to Unicode in visual order
+TEXT_LAYER_MAX_BROKEN_WORD_RATIO = 0.05
+# Render cache: rendered pages are kept on disk as .npy files keyed by PDF
+# content hash, page, DPI, color mode and clip, and served memory-mapped
+USE_RENDER_CACHE = True
+RENDER_CACHE_MAX_BYTES = 8 * 1024**3
+# Number of stored renders between two eviction scans of the cache; renders
+# are large, so the cache may overshoot its limit by this many pages
+RENDER_CACHE_EVICT_INTERVAL = 20
+# ROI preprocessing: "native" processes card crops at IMAGE_DPI,
+# "normalized" resamples them to OCR_TARGET_DPI before blurring and
+# denoising; kernel sizes in image_process.yml are tuned for IMAGE_DPI and
+# scaled to the resolution being processed
+ROI_PREPROCESS_MODE = "native"
+OCR_TARGET_DPI = 300
+# Layout template: the card grid detected on the first pages of a roll is
+# reused on later pages whose card edges are verified on a render at
+# ROI_DETECTION_DPI, pages failing the check fall back to full detection
+USE_LAYOUT_TEMPLATE = True
+# Number of consecutive pages with the same card grid needed to learn it
+LAYOUT_TEMPLATE_LEARN_PAGES = 2
+# Distance (in points) within which card rectangles count as the same
+LAYOUT_TEMPLATE_TOLERANCE = 3
+# Minimum darkness (255 - mean gray level) of a card edge to count as drawn
+LAYOUT_TEMPLATE_MIN_EDGE_DARKNESS = 80
+# Margin (in points) added around a detected card rectangle before it is
+# re-rendered and refined at IMAGE_DPI
+ROI_CLIP_MARGIN = 4
+# OCR engine: "pytesseract" spawns a tesseract process per call,
+# "tesserocr" keeps an in-process Tesseract API per worker and language,
+# "easyocr" keeps an EasyOCR reader per process and language set
+OCR_ENGINE = "pytesseract"
+# EasyOCR settings: readers run on the CPU unless EASYOCR_USE_GPU is set,
+# and recognize EASYOCR_BATCH_SIZE text boxes per model call
+EASYOCR_USE_GPU = False
+EASYOCR_BATCH_SIZE = 16
+# OCR executor: each worker reads card halves on a pool of OCR threads while
+# it preprocesses the next cards. OCR_EXECUTOR_THREADS = 0 sizes the pool
+# to the cores left per worker process once every Tesseract call uses
+# OCR_OMP_THREAD_LIMIT OpenMP threads. At most OCR_EXECUTOR_MAX_PENDING
+# halves are queued or in OCR at a time
+USE_OCR_EXECUTOR = True
+OCR_EXECUTOR_THREADS = 0
+OCR_EXECUTOR_MAX_PENDING = 4
+OCR_OMP_THREAD_LIMIT = 1
+# Field template: cards matching field_template.json have only their value
+# regions OCR'd, one text line per field with a character whitelist, and
+# skip the text post-processing. Other cards take the full-card path. It
+# makes several small OCR calls per card, so it pays off with "tesserocr"
+USE_FIELD_TEMPLATE = False
+# OCR escalation ladder: cards are read with the first tier and re-read
+# with the next one while the mean word confidence of a side is under
+# OCR_LADDER_MIN_CONFIDENCE or a required field is missing. "dpi" is the
+# resolution cards are resampled to and OCR'd at, in place of the profile's
+# "preprocess_mode" and "ocr_dpi", "denoise" adds the denoise, threshold and
+# morphology steps. Tesseract engines only
+USE_OCR_LADDER = False
+OCR_LADDER_TIERS = [
+    {"name": "fast", "dpi": 300, "denoise": False},
+    {"name": "native", "dpi": IMAGE_DPI, "denoise": False},
+    {"name": "denoised", "dpi": IMAGE_DPI, "denoise": True},
+]
+OCR_LADDER_MIN_CONFIDENCE = 70
+OCR_LADDER_REQUIRED_FIELDS = ["voter_id"]
+# Language routing: the script of every card half is detected from its
+# pixels (Devanagari headlines) and the half is read with the smallest
+# language set, a key of the OCR engine's Lang table, instead of the
+# profile's language for that side
+USE_LANGUAGE_ROUTING = False
+ROUTING_LANGS = {
+    "devanagari": "HINDI",
+    "latin": "ENGLISH",
+    "mixed": "HIN_ENG",
+}
+# Shortest horizontal stroke (in points) counted as a Devanagari headline,
+# longer than the bars of Latin letters at card font sizes
+ROUTING_HEADLINE_MIN_POINTS = 9
+# Share of a line's ink on headlines above which the line is Devanagari
+ROUTING_MIN_HEADLINE_RATIO = 0.05
+# Lines shorter than this (in points) are rules or noise, not text
+ROUTING_MIN_LINE_POINTS = 4
+# Batched OCR: the card halves of a page are stacked into tall canvases,
+# one per language, and read with a single OCR call each instead of one
+# call per half
+USE_BATCHED_OCR = False
+# Blank band (in points) between stacked card halves
+OCR_BATCH_SEPARATOR_POINTS = 18
+# Tallest canvas (in pixels) handed to Tesseract, which rejects images
+# with a side over 32767 pixels
+OCR_BATCH_MAX_HEIGHT = 30000
+# OCR cache: OCR results are kept on disk keyed by a hash of the
+# preprocessed image and the engine, language and config used to read it
+USE_OCR_CACHE = True
+OCR_CACHE_MAX_BYTES = 512 * 1024**2
+OCR_CACHE_MAX_AGE_DAYS = 90
+# Number of stored results between two eviction scans of the cache
+OCR_CACHE_EVICT_INTERVAL = 500
+# Processing profiles set the speed/accuracy knobs together: the
+# resolution card crops are processed and OCR'd at ("preprocess_mode" and
+# "ocr_dpi", as ROI_PREPROCESS_MODE and OCR_TARGET_DPI), whether they are
+# denoised and binarized, the tesseract config (a key of
+# OcrProcess.Pytesseract.Config) and the language of each card side (keys
+# of the OCR engine's Lang table). A profile may also set "de_noise" and
+# "threshold", dicts overriding the process_roi values of those sections of
+# image_process.yml, e.g. {"H": 10} (attribute names of ImageProcess).
+# PROCESSING_PROFILE applies to every PDF not listed by file name in
+# PDF_PROCESSING_PROFILES
+PROCESSING_PROFILE = "balanced"
+PDF_PROCESSING_PROFILES = {}
+PROCESSING_PROFILES = {
+    "fast": {
+        "preprocess_mode": "normalized",
+        "ocr_dpi": 300,
+        "denoise": False,
+        "ocr_config": "ONE",
+        "left_lang": "HINDI",
+        "right_lang": "ENGLISH",
+    },
+    "balanced": {
+        "preprocess_mode": ROI_PREPROCESS_MODE,
+        "ocr_dpi": OCR_TARGET_DPI,
+        "denoise": False,
+        "ocr_config": "FIVE",
+        "left_lang": "HIN_ENG",
+        "right_lang": "ENGLISH",
+    },
+    "accurate": {
+        "preprocess_mode": "native",
+        "ocr_dpi": OCR_TARGET_DPI,
+        "denoise": True,
+        "ocr_config": "FIVE",
+        "left_lang": "HIN_ENG",
+        "right_lang": "ENGLISH",
+    },
+}
 START_PAGE = 3
 PAGE_TO_EXCLUDE = 2
 
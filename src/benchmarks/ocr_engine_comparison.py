@@ -0,0 +1,127 @@
+"""
+Micro-benchmark of the per-card OCR latency of the pytesseract subprocess
+backend against the in-process tesserocr backend, on the cards of a PDF.
+
+Cards are detected and preprocessed once, so only the OCR of the two card
+halves is timed. The first card of each engine also pays for loading the
+traineddata and is reported as a warm-up rather than in the statistics.
+
+    python -m src.benchmarks.ocr_engine_comparison <pdf> [--pages 3 4]
+"""
+
+import argparse
+import time
+import pandas as pd
+from config.settings import START_PAGE, PAGE_TO_EXCLUDE
+from src.enums.enums import ImageType, OcrEngine
+from src.processors.ocr.ocr_processor import OcrProcessor
+from src.processors.pdf.pdf_processor import PdfProcessor
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+ENGINES = (OcrEngine.PYTESSERACT, OcrEngine.TESSEROCR)
+
+
+def _prepare_cards(processor, pdf, pages):
+    """
+    Returns the preprocessed (left, right) halves of every card of the
+    given pages, keyed by (page, card).
+    """
+    cards = {}
+    image_processor = processor.image_processor
+    for page_num in pages:
+        log.info(f"Preparing cards of page {page_num}")
+        _, roi_images = processor.roi_provider.get_rois(
+            pdf=pdf, page_num=page_num
+        )
+        for card_num, roi_image in enumerate(roi_images or []):
+            processed_roi = image_processor.process_image(
+                roi_image, type=ImageType.ROI_IMAGE
+            )
+            cards[(page_num, card_num)] = (
+                image_processor.split_roi_into_sides(processed_roi)
+            )
+    return cards
+
+
+def compare_ocr_engines(pdf_path, pages=None, repeat=1):
+    """
+    OCRs every card of the given pages (all content pages by default)
+    `repeat` times with each engine and returns one row per card and run
+    with the OCR time of each engine and whether both read the same text.
+    """
+    processor = PdfProcessor(pdf_path=pdf_path)
+    pdf = processor.pdf_reader.open_pdf()
+    if pdf is None:
+        return None
+
+    try:
+        if pages is None:
+            pages = range(START_PAGE, pdf.page_count - PAGE_TO_EXCLUDE)
+        cards = _prepare_cards(processor, pdf, pages)
+    finally:
+        pdf.close()
+
+    if not cards:
+        log.warning("No cards found to benchmark")
+        return pd.DataFrame()
+
+    dpi = processor.image_processor.get_processing_dpi()
+    # Cached results would hide the OCR time being measured
+    ocr_processors = {
+        engine: OcrProcessor(ocr_engine=engine, use_ocr_cache=False)
+        for engine in ENGINES
+    }
+
+    for engine, ocr_processor in ocr_processors.items():
+        left_side, right_side = next(iter(cards.values()))
+        start = time.perf_counter()
+        ocr_processor.perform_ocr_on_sides(left_side, right_side, dpi=dpi)
+        log.info(
+            f"{engine} warm-up card: {time.perf_counter() - start:.3f}s"
+        )
+
+    rows = []
+    for run in range(repeat):
+        for (page_num, card_num), (left_side, right_side) in cards.items():
+            row = {"run": run, "page": page_num, "card": card_num}
+            texts = {}
+            for engine, ocr_processor in ocr_processors.items():
+                start = time.perf_counter()
+                texts[engine] = ocr_processor.perform_ocr_on_sides(
+                    left_side, right_side, dpi=dpi
+                )
+                row[f"{engine.value}_seconds"] = time.perf_counter() - start
+            row["same_text"] = len(set(texts.values())) == 1
+            rows.append(row)
+
+    comparison = pd.DataFrame(rows)
+    subprocess_seconds = comparison[f"{OcrEngine.PYTESSERACT.value}_seconds"]
+    in_process_seconds = comparison[f"{OcrEngine.TESSEROCR.value}_seconds"]
+    log.info(
+        f"OCR'd {len(cards)} cards {repeat} times: per-card median "
+        f"pytesseract {subprocess_seconds.median() * 1000:.1f}ms vs "
+        f"tesserocr {in_process_seconds.median() * 1000:.1f}ms "
+        f"({subprocess_seconds.sum() / in_process_seconds.sum():.2f}x), "
+        f"{(~comparison['same_text']).sum()} runs read different text"
+    )
+    return comparison
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare per-card latency of the Tesseract OCR backends"
+    )
+    parser.add_argument("pdf_path")
+    parser.add_argument("--pages", type=int, nargs="*")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", help="CSV file to write the rows to")
+    args = parser.parse_args()
+
+    comparison = compare_ocr_engines(
+        args.pdf_path, pages=args.pages, repeat=args.repeat
+    )
+    if comparison is not None and args.output:
+        comparison.to_csv(args.output, index=False)
+    print(comparison)
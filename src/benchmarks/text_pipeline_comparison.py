@@ -0,0 +1,97 @@
+"""
+Throughput of the card text post-processing, in cards per second, of the
+TextProcessor decorator stack against the fused TextPipeline, on recorded
+OCR text.
+
+The OCR text is read from the .txt files of a directory, by default the
+OCR cache, where every file holds the text of one card half. Files are
+taken two at a time as the (left, right) halves of a card. Both
+implementations must give the same fields for every card; the cards that
+differ are reported.
+
+    python -m src.benchmarks.text_pipeline_comparison [--texts-dir DIR]
+"""
+
+import argparse
+import time
+from pathlib import Path
+from config.settings import OCR_CACHE_DIR
+from src.processors.text.text_processor import TextProcessor
+from src.processors.text.text_pipeline import TextPipeline
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+def _load_cards(texts_dir, limit=None):
+    paths = sorted(Path(texts_dir).glob("*.txt"))
+    texts = [path.read_text(encoding="utf-8") for path in paths[:limit]]
+    return list(zip(texts[::2], texts[1::2]))
+
+
+def _format_card_stacked(left_text, right_text):
+    user_dict = {
+        **TextProcessor._format_text_stacked(left_text),
+        **TextProcessor._format_text_stacked(right_text),
+    }
+    return TextProcessor._standardize_field_name_stacked(user_dict)
+
+
+def _time_cards(format_card, cards, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [format_card(left, right) for left, right in cards]
+    seconds = time.perf_counter() - start
+    return results, len(cards) * repeat / seconds
+
+
+def compare_text_pipelines(texts_dir=OCR_CACHE_DIR, limit=None, repeat=3):
+    """
+    Post-processes the recorded cards with both implementations and
+    returns (stacked cards/s, fused cards/s, indexes of differing cards).
+    """
+    cards = _load_cards(texts_dir, limit=limit)
+    if not cards:
+        log.warning(f"No recorded OCR text found in {texts_dir}")
+        return None
+
+    pipeline = TextPipeline()
+    # Loads the corrections and digit table ahead of the timing
+    pipeline.format_card(*cards[0])
+
+    stacked, stacked_rate = _time_cards(_format_card_stacked, cards, repeat)
+    fused, fused_rate = _time_cards(pipeline.format_card, cards, repeat)
+
+    mismatches = [
+        index
+        for index, (want, got) in enumerate(zip(stacked, fused))
+        if list(want.items()) != list(got.items())
+    ]
+    log.info(
+        f"Post-processed {len(cards)} cards {repeat} times: decorator "
+        f"stack {stacked_rate:.0f} cards/s, fused pipeline "
+        f"{fused_rate:.0f} cards/s ({fused_rate / stacked_rate:.2f}x), "
+        f"{len(mismatches)} cards differ"
+    )
+    return stacked_rate, fused_rate, mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare card text post-processing throughput"
+    )
+    parser.add_argument("--texts-dir", default=OCR_CACHE_DIR)
+    parser.add_argument("--limit", type=int, help="Number of text files")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    result = compare_text_pipelines(
+        args.texts_dir, limit=args.limit, repeat=args.repeat
+    )
+    if result is not None:
+        stacked_rate, fused_rate, mismatches = result
+        print(
+            f"decorator stack: {stacked_rate:.0f} cards/s\n"
+            f"fused pipeline: {fused_rate:.0f} cards/s\n"
+            f"differing cards: {mismatches}"
+        )
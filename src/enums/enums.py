@@ -8,10 +8,53 @@ from config.settings import (
 
 class OcrEngine(Enum):
     TENSORFLOW = "tensorflow"
-    PYTESSERACT = "pytesseract"
+    PYTESSERACT = "pytesseract"  # Tesseract subprocess per call
+    TESSEROCR = "tesserocr"  # Long-lived in-process Tesseract API
     EASYOCR = "easyocr"
 
 
+class ExecutionMode(Enum):
+    PDF_PARALLEL = "pdf"  # One process per PDF, pages in sequence
+    PAGE_PARALLEL = "page"  # Pages of a single PDF across a worker pool
+
+
+class RenderMode(Enum):
+    FULL_PAGE = "full_page"  # Whole page at OCR DPI
+    TWO_PASS = "two_pass"  # Low DPI ROI detection, card clips at OCR DPI
+
+
+class RoiSource(Enum):
+    VECTOR = "vector"  # Card rectangles from the PDF drawing commands
+    RASTER = "raster"  # Card contours detected on a rendered page
+    AUTO = "auto"  # Vector first, raster for pages without drawings
+
+
+class ExtractionPath(Enum):
+    TEXT_LAYER = "text_layer"  # Text read from the PDF text layer
+    OCR = "ocr"  # Text recognized from the rendered cards
+
+
+class ColorMode(Enum):
+    GRAY = "gray"
+    RGB = "rgb"
+
+
+class NmsMode(Enum):
+    THRESHOLD = "threshold"
+    IOU = "iou"
+
+
+class ProcessingProfile(Enum):
+    FAST = "fast"  # Backlog runs, cards processed at low resolution
+    BALANCED = "balanced"  # Default settings
+    ACCURATE = "accurate"  # Careful re-runs, full resolution and denoising
+
+
+class PreprocessMode(Enum):
+    NATIVE = "native"  # Card crops processed at IMAGE_DPI
+    NORMALIZED = "normalized"  # Card crops resampled to OCR_TARGET_DPI
+
+
 # Define an Enum class
 class FileNamePart(Enum):
     FULL = "full"  # Represents the full filename with extension
@@ -1,7 +1,9 @@
 import sys
 import os
 import time
+import argparse
 import multiprocessing
+from functools import partial
 
 # Add the project root to sys.path
 current_dir = os.path.dirname(
@@ -16,6 +18,7 @@ from config.settings import (
     PDF_DIR,
     PDF_PATH,
     PDF_PROCESS_CONTROL,
+    PDF_EXECUTION_MODE,
 )
 
 from config.config_loader import load_enums
@@ -23,22 +26,22 @@ from config.config_loader import load_enums
 from src.processors.pdf.pdf_processor import PdfProcessor
 from src.utils.logger import setup_logger
 from src.decorator.system_service import start_service
-from src.enums.enums import ServiceName
+from src.enums.enums import ServiceName, ExecutionMode, ProcessingProfile
 
 # Initialize logger
 log = setup_logger(__name__)
 
 
-def process_pdf(pdf_path):
+def process_pdf(pdf_path, profile=None):
     # Create a PdfProcessor instance
-    pdf_processor = PdfProcessor(pdf_path=pdf_path)
+    pdf_processor = PdfProcessor(pdf_path=pdf_path, profile=profile)
     log.debug(f"PDF processor initialized for {pdf_path}")
     pdf_processor.save_voter_information_from_pdf()
     log.info(f"PDF processing completed for {pdf_path}")
 
 
 @start_service(service_name=ServiceName.DATABASE.value)
-def start():
+def start(profile=None):
     log.info("Starting PDF processing application")
     # Load the configuration
     log.debug("Loading configuration from %s", CONFIG_FILES_DIR)
@@ -54,18 +57,36 @@ def start():
     pdf_paths = list(PDF_DIR.glob("*.pdf"))
     log.info("Found %s PDF files in %s", len(pdf_paths), PDF_DIR)
 
+    if ExecutionMode(PDF_EXECUTION_MODE) == ExecutionMode.PAGE_PARALLEL:
+        # Pool workers are daemonic and cannot start a page pool of their
+        # own, so PDFs are taken one at a time and their pages fan out
+        log.info("Processing PDFs one at a time with page-level workers")
+        for pdf_path in pdf_paths:
+            process_pdf(pdf_path, profile=profile)
+        return
+
     num_processes = min(
         PDF_PROCESS_CONTROL, multiprocessing.cpu_count(), len(pdf_paths)
     )
 
     log.info("Starting PDF processing with %s processes", num_processes)
     with multiprocessing.Pool(processes=num_processes) as pool:
-        pool.map(process_pdf, pdf_paths)
+        pool.map(partial(process_pdf, profile=profile), pdf_paths)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extract voter data from PDFs"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=[profile.value for profile in ProcessingProfile],
+        help="Processing profile of every PDF, overriding the settings",
+    )
+    args = parser.parse_args()
+
     start_time = time.time()
-    start()
+    start(profile=ProcessingProfile(args.profile) if args.profile else None)
 
     end_time = time.time()
     execution_time = end_time - start_time
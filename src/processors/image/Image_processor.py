@@ -5,9 +5,23 @@ import re
 import numpy as np
 import cv2 as cv
 from config.config_files.config import ImageProcess
-from src.enums.enums import ImageType, ImageExtensions
+from src.enums.enums import (
+    ImageType,
+    ImageExtensions,
+    NmsMode,
+    PreprocessMode,
+)
 import base64
-from config.settings import NUM_SECTION
+from config.settings import (
+    NUM_SECTION,
+    IMAGE_DPI,
+    POINTS_PER_INCH,
+    ROI_NMS_MODE,
+    ROI_NMS_IOU_THRESHOLD,
+    ROI_PREPROCESS_MODE,
+    OCR_TARGET_DPI,
+)
+from src.processors.image.preprocessed_image import PreprocessedImage
 from src.utils.logger import setup_logger
 
 log = setup_logger(__name__)
@@ -29,6 +43,10 @@ class ImageProcessor:
         erode=ImageProcess.Erode,
         color=ImageProcess.Color,
         color_width=ImageProcess.Border,
+        nms_mode=NmsMode(ROI_NMS_MODE),
+        iou_threshold=ROI_NMS_IOU_THRESHOLD,
+        preprocess_mode=PreprocessMode(ROI_PREPROCESS_MODE),
+        ocr_dpi=OCR_TARGET_DPI,
     ):
         self.blur = blur
         self.edge_detection = edge_detection
@@ -42,34 +60,86 @@ class ImageProcessor:
         self.erode = erode
         self.color = color
         self.color_width = color_width
+        self.nms_mode = nms_mode
+        self.iou_threshold = iou_threshold
+        self.preprocess_mode = preprocess_mode
+        self.ocr_dpi = ocr_dpi
 
-    def _is_duplicate_coords(
-        self, coords_list, contour, position_threshold=500, size_threshold=200
+    @staticmethod
+    def _get_bounding_boxes(contours):
+        """
+        Returns the (x, y, w, h) bounding box of every contour as an (N, 4)
+        array, as cv.boundingRect would, from one pass over the stacked
+        contour points.
+        """
+        if len(contours) == 0:
+            return np.empty((0, 4), dtype=np.int64)
+
+        lengths = np.fromiter(
+            (len(contour) for contour in contours),
+            dtype=np.intp,
+            count=len(contours),
+        )
+        points = np.concatenate(contours).reshape(-1, 2)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        mins = np.minimum.reduceat(points, starts, axis=0)
+        maxs = np.maximum.reduceat(points, starts, axis=0)
+        return np.hstack((mins, maxs - mins + 1)).astype(np.int64)
+
+    @staticmethod
+    def _iou_matrix(rects):
+        x0, y0, w, h = rects.T
+        x1, y1 = x0 + w, y0 + h
+        inter_w = np.minimum(x1[:, None], x1) - np.maximum(x0[:, None], x0)
+        inter_h = np.minimum(y1[:, None], y1) - np.maximum(y0[:, None], y0)
+        inter = np.clip(inter_w, 0, None) * np.clip(inter_h, 0, None)
+        union = (w * h)[:, None] + w * h - inter
+        return np.divide(
+            inter, union, out=np.zeros_like(inter), where=union > 0
+        )
+
+    def suppress_duplicate_rects(
+        self, rects, position_threshold, size_threshold
     ):
-        x, y, w, h = cv.boundingRect(contour)
-        # Only detailed coordinates in DEBUG level
-        log.debug(f"Checking contour bounds: x={x}, y={y}, w={w}, h={h}")
-
-        for existing_rect in coords_list:
-            existing_x, existing_y, existing_w, existing_h = existing_rect
-            # Comparison details only in DEBUG
-            log.debug(
-                f"Comparing with existing rect: x={existing_x}, y={existing_y}, w={existing_w}, h={existing_h}"
+        """
+        Returns the indices, in input order, of the (x, y, w, h) rectangles
+        left after dropping every rectangle that duplicates an earlier kept
+        one: within `position_threshold` and `size_threshold` of it for
+        NmsMode.THRESHOLD, overlapping it by at least `iou_threshold` for
+        NmsMode.IOU.
+        """
+        rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+        if self.nms_mode == NmsMode.IOU:
+            duplicate = self._iou_matrix(rects) >= self.iou_threshold
+        else:
+            x, y, w, h = rects.T
+            duplicate = (
+                (np.abs(x[:, None] - x) < position_threshold)
+                & (np.abs(y[:, None] - y) < position_threshold)
+                & (np.abs(w[:, None] - w) < size_threshold)
+                & (np.abs(h[:, None] - h) < size_threshold)
             )
 
-            if (
-                abs(existing_x - x) < position_threshold
-                and abs(existing_y - y) < position_threshold
-                and abs(existing_w - w) < size_threshold
-                and abs(existing_h - h) < size_threshold
-            ):
-                # Important events in INFO
-                log.info("Duplicate coordinates found")
-                return True
+        keep = []
+        suppressed = np.zeros(len(rects), dtype=bool)
+        for index in range(len(rects)):
+            if suppressed[index]:
+                continue
+            keep.append(index)
+            suppressed |= duplicate[index]
+
+        log.debug(
+            f"Kept {len(keep)} of {len(rects)} rectangles with {self.nms_mode}"
+        )
+        return keep
 
-        # Process completion in DEBUG
-        log.debug("No duplicate coordinates found")
-        return False
+    def _border_color(self, image):
+        # Gray value the green outline had on RGB pages run through
+        # COLOR_BGR2GRAY, so grayscale pages are outlined the same way
+        if image.ndim == 2:
+            color = np.array([[self.color.GREEN]], dtype=np.uint8)
+            return int(cv.cvtColor(color, cv.COLOR_BGR2GRAY)[0, 0])
+        return self.color.GREEN
 
     def _process_image(
         self,
@@ -82,35 +152,40 @@ class ImageProcessor:
         morphology,
         erode,
         type=ImageType.PASSPORT,
+        dpi=IMAGE_DPI,
+        denoise=False,
     ):
-        log.info(f"Processing image with type: {type}")
+        log.info(f"Processing image with type: {type} at {dpi} DPI")
 
         if image is None:
             log.error("Image not found or unsupported format")
             raise ValueError("Image not found or unsupported format.")
 
-        # Convert to grayscale
-        log.debug("Converting image to grayscale")
-        gray = cv.cvtColor(image, cv.COLOR_BGR2GRAY)
-
-        # Apply Gaussian blur
+        # Grayscale and Gaussian blur, cut out of the page's blurred image
+        # when the image is a crop of a preprocessed page
+        ksize = self._scale_ksize(blur.KSIZE, dpi)
         log.debug(
-            f"Applying Gaussian blur with ksize={blur.KSIZE}, sigma={blur.SIGMA_X}"
+            f"Applying Gaussian blur with ksize={ksize}, sigma={blur.SIGMA_X}"
+        )
+        blurred = PreprocessedImage.wrap(image, dpi).blurred(
+            ksize, blur.SIGMA_X
         )
-        blurred = cv.GaussianBlur(gray, blur.KSIZE, blur.SIGMA_X)
 
-        if type == ImageType.ROI_IMAGE:
+        if type == ImageType.ROI_IMAGE and not denoise:
             log.info("ROI image processing completed")
             return blurred
 
         # Denoise the blurred image
-        log.debug("Applying denoising with parameters: h={de_noise.H}")
+        log.debug(f"Applying denoising with parameters: h={de_noise.H}")
+        template_window, search_window = self._scale_ksize(
+            (de_noise.TEMPLATE_WINDOW_SIZE, de_noise.SEARCH_WINDOW_SIZE), dpi
+        )
         denoised_image = cv.fastNlMeansDenoising(
             src=blurred,
             dst=None,
             h=de_noise.H,
-            templateWindowSize=de_noise.TEMPLATE_WINDOW_SIZE,
-            searchWindowSize=de_noise.SEARCH_WINDOW_SIZE,
+            templateWindowSize=template_window,
+            searchWindowSize=search_window,
         )
 
         # Apply sharpening filter
@@ -135,7 +210,9 @@ class ImageProcessor:
         log.debug("Applying morphological transformation")
         kernel = np.ones((3, 3), np.uint8)
         noise_reduced = cv.morphologyEx(
-            src=thresh, op=morphology.OPERATION, kernel=morphology.KERNEL
+            src=thresh,
+            op=morphology.OPERATION,
+            kernel=self._scale_ksize(morphology.KERNEL, dpi),
         )
 
         # Dilation
@@ -148,28 +225,36 @@ class ImageProcessor:
         log.info("Image processing completed successfully")
         return dilated
 
-    def _find_contours(self, image, blur, edge_detection, contourConfig):
+    @staticmethod
+    def _scale_ksize(ksize, dpi, reference_dpi=IMAGE_DPI):
+        """
+        Scales a kernel size tuned for `reference_dpi` to an image rendered
+        at `dpi`, keeping every dimension odd and at least 1.
+        """
+        scale = dpi / reference_dpi
+        scaled = []
+        for size in ksize:
+            size = max(1, round(size * scale))
+            scaled.append(size if size % 2 else size + 1)
+        return tuple(scaled)
+
+    def _find_contours(
+        self, image, blur, edge_detection, contourConfig, ksize=None
+    ):
         log.info("Starting contour detection process")
 
         if image is None:
             log.error("Could not read the image")
             raise FileNotFoundError(f"Could not read the image")
 
-        # Step 1: Convert to grayscale
-        log.debug("Converting image to grayscale")
-        gray = cv.cvtColor(image, cv.COLOR_BGR2GRAY)
-
-        log.debug(f"Applying Gaussian blur with ksize={blur.KSIZE}")
-        blurred = cv.GaussianBlur(gray, blur.KSIZE, blur.SIGMA_X)
-
-        # Step 2: Apply edge detection
-        log.debug(
-            f"Applying Canny edge detection with thresholds: {edge_detection.Canny.THRESHOLD1}, {edge_detection.Canny.THRESHOLD2}"
-        )
-        edges = cv.Canny(
-            blurred,
-            edge_detection.Canny.THRESHOLD1,
-            edge_detection.Canny.THRESHOLD2,
+        # Step 1 and 2: Grayscale, blur and edge detection, shared with
+        # the other steps working on the same page
+        preprocessed = PreprocessedImage.wrap(image)
+        edges = preprocessed.edges(
+            ksize=ksize or blur.KSIZE,
+            sigma_x=blur.SIGMA_X,
+            threshold1=edge_detection.Canny.THRESHOLD1,
+            threshold2=edge_detection.Canny.THRESHOLD2,
         )
 
         # Step 3: Find contours
@@ -199,100 +284,149 @@ class ImageProcessor:
         log.info(f"Starting image extraction for type: {type}")
         log.debug(f"Processing {len(contours)} contours")
 
-        large_rectangles = []
-        roi_images = []
-        detected_passport = None
-
-        for contour in contours:
-            x, y, w, h = cv.boundingRect(contour)
-            area = w * h
-            aspect_ratio = w / h
+        boxes = self._get_bounding_boxes(contours)
+        areas = boxes[:, 2] * boxes[:, 3]
+        aspect_ratios = boxes[:, 2] / boxes[:, 3]
+        candidates = boxes[
+            (min_area_threshold < areas)
+            & (areas < max_area_threshold)
+            & (min_aspect_ratio < aspect_ratios)
+            & (aspect_ratios < max_aspect_ratio)
+        ]
+        log.debug(
+            f"{len(candidates)} contours within area and aspect ratio limits"
+        )
 
-            log.debug(
-                f"Contour metrics - Area: {area}, Aspect ratio: {aspect_ratio}"
+        if type == ImageType.ROI_IMAGE:
+            log.debug("Processing ROI image type")
+            keep = self.suppress_duplicate_rects(
+                rects=candidates,
+                position_threshold=position_threshold,
+                size_threshold=size_threshold,
             )
-
-            if (
-                min_area_threshold < area < max_area_threshold
-                and min_aspect_ratio < aspect_ratio < max_aspect_ratio
-            ):
-                if type == ImageType.ROI_IMAGE:
-                    log.debug("Processing ROI image type")
-                    duplicate = self._is_duplicate_coords(
-                        coords_list=large_rectangles,
-                        contour=contour,
-                        position_threshold=position_threshold,
-                        size_threshold=size_threshold,
+            large_rectangles = [
+                tuple(int(value) for value in candidates[index])
+                for index in keep
+            ]
+
+        elif type == ImageType.PASSPORT:
+            log.debug("Processing passport image type")
+            for x, y, w, h in candidates:
+                detected_passport = image[y : y + h, x : x + w]
+                if detected_passport.ndim == 3:
+                    # Pages are rendered as RGB, imencode expects BGR
+                    detected_passport = cv.cvtColor(
+                        detected_passport, cv.COLOR_RGB2BGR
                     )
-
-                    if not duplicate:
-                        log.debug(
-                            f"Adding new rectangle at x={x}, y={y}, w={w}, h={h}"
-                        )
-                        large_rectangles.append((x, y, w, h))
-
-                        cv.rectangle(
-                            image,
-                            (x, y),
-                            (x + w, y + h),
-                            color.GREEN,
-                            color_width.WIDTH,
-                        )
-                        cropped_image = image[y : y + h, x : x + w]
-                        roi_images.append(cropped_image)
-
-                elif type == ImageType.PASSPORT:
-                    log.debug("Processing passport image type")
-                    detected_passport = image[y : y + h, x : x + w]
-                    success, binary_passport_image = cv.imencode(
-                        ext=ext, img=detected_passport
-                    )
-                    if success:
-                        log.info("Successfully encoded passport image")
-                        return True, binary_passport_image.tobytes()
+                success, binary_passport_image = cv.imencode(
+                    ext=ext, img=detected_passport
+                )
+                if success:
+                    log.info("Successfully encoded passport image")
+                    return True, binary_passport_image.tobytes()
 
         if type == ImageType.ROI_IMAGE:
-            log.info(f"Extracted {len(roi_images)} ROI images")
-            return roi_images
+            log.info(f"Detected {len(large_rectangles)} ROI rectangles")
+            return large_rectangles
 
         log.warning("No passport-sized photo detected")
         return False, None
 
-    def extract_roi_from_image(self, image):
-        log.info("Starting ROI extraction process")
-        try:
-            # load config
-            log.debug("Loading ROI configuration parameters")
-            blur = self.blur.ImageRoi
-            edge_detection = self.edge_detection.ImageRoi
-            contours = self.contours.ImageRoi
-            contour_area = self.contour_area.ImageRoi
-            color = self.color
-            color_width = self.color_width
+    def _detect_roi_rects(self, image, dpi):
+        # load config
+        log.debug("Loading ROI configuration parameters")
+        blur = self.blur.ImageRoi
+        edge_detection = self.edge_detection.ImageRoi
+        contours = self.contours.ImageRoi
+        contour_area = self.contour_area.ImageRoi
 
-            # find all the contours
-            log.debug("Finding contours in image")
-            contours = self._find_contours(
-                image=image,
-                blur=blur,
-                edge_detection=edge_detection,
-                contourConfig=contours,
-            )
+        # ROI thresholds are given in PDF points, scale them to pixels
+        scale = dpi / POINTS_PER_INCH
+        log.debug(f"Scaling ROI thresholds for {dpi} DPI (x{scale})")
 
-            log.debug("Extracting ROI images from contours")
-            roi_images = self._extract_images(
-                image=image,
-                type=ImageType.ROI_IMAGE,
-                contours=contours,
-                min_area_threshold=contour_area.MIN_AREA_THRESHOLD,
-                max_area_threshold=contour_area.MAX_AREA_THRESHOLD,
-                min_aspect_ratio=contour_area.MIN_ASPECT_RATIO,
-                max_aspect_ratio=contour_area.MAX_ASPECT_RATIO,
-                position_threshold=contour_area.POSITION_THRESHOLD,
-                size_threshold=contour_area.SIZE_THRESHOLD,
-                color=color,
-                color_width=color_width,
+        # find all the contours
+        log.debug("Finding contours in image")
+        contours = self._find_contours(
+            image=image,
+            blur=blur,
+            edge_detection=edge_detection,
+            contourConfig=contours,
+            ksize=self._scale_ksize(blur.KSIZE, dpi),
+        )
+
+        log.debug("Extracting ROI rectangles from contours")
+        return self._extract_images(
+            image=image,
+            type=ImageType.ROI_IMAGE,
+            contours=contours,
+            min_area_threshold=contour_area.MIN_AREA_THRESHOLD * scale**2,
+            max_area_threshold=contour_area.MAX_AREA_THRESHOLD * scale**2,
+            min_aspect_ratio=contour_area.MIN_ASPECT_RATIO,
+            max_aspect_ratio=contour_area.MAX_ASPECT_RATIO,
+            position_threshold=contour_area.POSITION_THRESHOLD * scale,
+            size_threshold=contour_area.SIZE_THRESHOLD * scale,
+            color=self.color,
+            color_width=self.color_width,
+        )
+
+    def crop_roi_images(self, image, rects):
+        """
+        Crops every (x, y, w, h) rectangle out of the image and outlines it.
+        A crop also gets the outline of any neighbouring rectangle reaching
+        into it, as if all outlines were drawn on the page before cropping.
+        The source image is left untouched, so it may be read-only.
+
+        Crops of a PreprocessedImage are returned as preprocessing stages
+        sharing the page intermediates, crops of an array as arrays.
+        """
+        log.debug(f"Cropping {len(rects)} ROI images")
+        preprocessed = PreprocessedImage.wrap(image)
+        color = self._border_color(preprocessed.image)
+        width = self.color_width.WIDTH
+        roi_images = []
+        for x, y, w, h in rects:
+            outlines = [
+                (ox - x, oy - y, ow, oh)
+                for ox, oy, ow, oh in rects
+                if (
+                    ox - width <= x + w
+                    and x <= ox + ow + width
+                    and oy - width <= y + h
+                    and y <= oy + oh + width
+                )
+            ]
+            roi = preprocessed.crop(
+                rect=(x, y, w, h), outlines=outlines, color=color, width=width
             )
+            if not isinstance(image, PreprocessedImage):
+                roi = roi.image
+            roi_images.append(roi)
+        return roi_images
+
+    def extract_roi_rects_from_image(self, image, dpi=IMAGE_DPI):
+        log.info(f"Starting ROI rectangle detection at {dpi} DPI")
+        try:
+            rects = self._detect_roi_rects(image=image, dpi=dpi)
+            log.info(f"Successfully detected {len(rects)} ROI rectangles")
+            return rects
+
+        except FileNotFoundError as e:
+            log.error(f"File not found error: {e}")
+            return None
+        except cv.error as e:
+            log.error(f"OpenCV error: {e}")
+            return None
+        except Exception as e:
+            log.error(f"Unexpected error during ROI detection: {e}")
+            return None
+
+    def extract_roi_from_image(self, image, dpi=IMAGE_DPI):
+        log.info("Starting ROI extraction process")
+        try:
+            rects = self._detect_roi_rects(image=image, dpi=dpi)
+
+            log.debug("Cropping ROI images from rectangles")
+            roi_images = self.crop_roi_images(image=image, rects=rects)
 
             log.info(
                 f"Successfully extracted {len(roi_images) if roi_images else 0} ROI images"
@@ -323,14 +457,16 @@ class ImageProcessor:
         color = self.color
         color_width = self.color_width
 
+        preprocessed = PreprocessedImage.wrap(image)
+
         # load height and width
-        height, width = image.shape[:2]
+        height, width = preprocessed.shape[:2]
         log.debug(f"Image dimensions: {width}x{height}")
 
         # find all the contours
         log.debug("Finding contours for passport detection")
         contours = self._find_contours(
-            image=image,
+            image=preprocessed,
             blur=blur,
             edge_detection=edge_detection,
             contourConfig=contours,
@@ -340,7 +476,7 @@ class ImageProcessor:
 
         log.debug("Extracting passport image")
         return self._extract_images(
-            image=image,
+            image=preprocessed.image,
             type=ImageType.PASSPORT,
             contours=contours,
             min_area_threshold=passport_area * contour_area.MIN_AREA_RATIO,
@@ -479,9 +615,49 @@ class ImageProcessor:
             log.error(f"Error in image conversion: {str(e)}")
             return None
 
-    def process_image(self, image, type):
+    @staticmethod
+    def resample(image, dpi, target_dpi):
+        """
+        Resamples an image rendered at `dpi` to `target_dpi`, averaging
+        pixels when shrinking and interpolating when enlarging.
+        """
+        if dpi == target_dpi:
+            return image
+        scale = target_dpi / dpi
+        interpolation = cv.INTER_AREA if scale < 1 else cv.INTER_CUBIC
+        log.debug(f"Resampling image from {dpi} to {target_dpi} DPI")
+        return cv.resize(
+            image, None, fx=scale, fy=scale, interpolation=interpolation
+        )
+
+    def get_processing_dpi(self, dpi=IMAGE_DPI):
+        """
+        Returns the resolution process_image works at, and hands to OCR,
+        for an image rendered at `dpi`.
+        """
+        if self.preprocess_mode == PreprocessMode.NORMALIZED:
+            return self.ocr_dpi
+        return dpi
+
+    def process_image(
+        self, image, type, dpi=IMAGE_DPI, normalize=True, denoise=False
+    ):
+        """
+        Preprocesses an image rendered at `dpi` for OCR, at the resolution
+        of get_processing_dpi, or at `dpi` itself without `normalize`.
+        ROI images are only blurred unless `denoise` adds the denoise,
+        threshold and morphology steps.
+        """
         log.info("Starting image processing")
         try:
+            if isinstance(image, PreprocessedImage):
+                dpi = image.dpi
+            processing_dpi = self.get_processing_dpi(dpi) if normalize else dpi
+            if processing_dpi != dpi:
+                image = self.resample(
+                    PreprocessedImage.wrap(image).image, dpi, processing_dpi
+                )
+
             # load config
             log.debug("Loading configuration parameters")
             blur = self.blur.ImageRoi
@@ -509,6 +685,8 @@ class ImageProcessor:
                 morphology=morphology,
                 erode=erode,
                 type=type,
+                dpi=processing_dpi,
+                denoise=denoise,
             )
 
             log.info("Image processing completed successfully")
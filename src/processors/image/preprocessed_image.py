@@ -0,0 +1,160 @@
+import numpy as np
+import cv2 as cv
+from config.settings import IMAGE_DPI
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+class PreprocessedImage:
+    """
+    Page-level preprocessing stage: the grayscale, blurred and edge
+    versions of an image, each computed once on first use and shared by
+    the steps working on the page (ROI detection, OCR preparation).
+
+    crop() returns the same stage over a rectangle of the image, reusing
+    the intermediates already computed on the page instead of computing
+    them again for every card.
+    """
+
+    def __init__(self, image, dpi=IMAGE_DPI):
+        self._image = image
+        self.dpi = dpi
+        self._cache = {}
+
+    @classmethod
+    def wrap(cls, image, dpi=IMAGE_DPI):
+        """
+        Returns `image` itself when it already is a preprocessing stage,
+        and a new stage over it otherwise.
+        """
+        if isinstance(image, PreprocessedImage):
+            return image
+        return cls(image=image, dpi=dpi)
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def image(self):
+        return self._image
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    @property
+    def gray(self):
+        """
+        The image as a single channel. Pages are rendered either in
+        grayscale already or as RGB (see PdfReader.extract_image_from_pdf).
+        """
+
+        def compute():
+            if self.image.ndim == 2:
+                return self.image
+            log.debug("Converting image to grayscale")
+            return cv.cvtColor(self.image, cv.COLOR_RGB2GRAY)
+
+        return self._cached("gray", compute)
+
+    def blurred(self, ksize, sigma_x):
+        def compute():
+            log.debug(f"Applying Gaussian blur with ksize={ksize}")
+            return cv.GaussianBlur(self.gray, tuple(ksize), sigma_x)
+
+        return self._cached(("blurred", tuple(ksize), sigma_x), compute)
+
+    def edges(self, ksize, sigma_x, threshold1, threshold2):
+        def compute():
+            log.debug(
+                f"Applying Canny edge detection with thresholds: "
+                f"{threshold1}, {threshold2}"
+            )
+            return cv.Canny(
+                self.blurred(ksize, sigma_x), threshold1, threshold2
+            )
+
+        key = ("edges", tuple(ksize), sigma_x, threshold1, threshold2)
+        return self._cached(key, compute)
+
+    def crop(self, rect, outlines=(), color=None, width=None):
+        """
+        Returns the stage over the (x, y, w, h) rectangle of the image.
+        `outlines` are rectangles, relative to the crop, drawn with `color`
+        and `width` on the crop's image, grayscale and blurred versions.
+        """
+        return PreprocessedCrop(
+            page=self, rect=rect, outlines=outlines, color=color, width=width
+        )
+
+
+class PreprocessedCrop(PreprocessedImage):
+    """
+    Rectangle of a PreprocessedImage. Intermediates the page has already
+    computed (e.g. the blur used for ROI detection) are cut out of the page
+    ones; the others are computed on the crop alone, so a step needed for a
+    few cards does not run over the whole page.
+    """
+
+    def __init__(self, page, rect, outlines=(), color=None, width=None):
+        super().__init__(image=None, dpi=page.dpi)
+        self.page = page
+        self.rect = rect
+        self.outlines = list(outlines)
+        self.color = color
+        self.width = width
+
+    def _cut(self, array):
+        x, y, w, h = self.rect
+        return array[y : y + h, x : x + w]
+
+    def _gray_color(self):
+        if np.isscalar(self.color):
+            return self.color
+        color = np.array([[self.color]], dtype=np.uint8)
+        return int(cv.cvtColor(color, cv.COLOR_RGB2GRAY)[0, 0])
+
+    def _outlined(self, array, color):
+        crop = self._cut(array)
+        if not self.outlines:
+            return crop
+        crop = crop.copy()
+        for x, y, w, h in self.outlines:
+            cv.rectangle(crop, (x, y), (x + w, y + h), color, self.width)
+        return crop
+
+    @property
+    def image(self):
+        return self._cached(
+            "image", lambda: self._outlined(self.page.image, self.color)
+        )
+
+    @property
+    def gray(self):
+        if self.image.ndim == 2:
+            return self.image
+        return self._cached(
+            "gray", lambda: self._outlined(self.page.gray, self._gray_color())
+        )
+
+    def blurred(self, ksize, sigma_x):
+        key = ("blurred", tuple(ksize), sigma_x)
+        if key not in self.page._cache:
+            return super().blurred(ksize, sigma_x)
+        return self._cached(
+            key,
+            lambda: self._outlined(
+                self.page.blurred(ksize, sigma_x), self._gray_color()
+            ),
+        )
+
+    def edges(self, ksize, sigma_x, threshold1, threshold2):
+        key = ("edges", tuple(ksize), sigma_x, threshold1, threshold2)
+        if key not in self.page._cache:
+            return super().edges(ksize, sigma_x, threshold1, threshold2)
+        return self._cut(
+            self.page.edges(ksize, sigma_x, threshold1, threshold2)
+        )
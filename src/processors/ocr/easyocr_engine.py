@@ -0,0 +1,89 @@
+import threading
+import numpy as np
+import easyocr
+from config.settings import EASYOCR_USE_GPU, EASYOCR_BATCH_SIZE
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+# EasyOCR readers of the current process, one per language set, created on
+# first use (or warm-up) and kept for the life of the process
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+class EasyOcrEngine:
+    """
+    EasyOCR backend keeping one reader per language set in each process,
+    so the detection and recognition models are loaded from disk once
+    instead of on every call.
+    """
+
+    def __init__(self, gpu=EASYOCR_USE_GPU, batch_size=EASYOCR_BATCH_SIZE):
+        self.gpu = gpu
+        self.batch_size = batch_size
+
+    @staticmethod
+    def parse_lang(lang):
+        """
+        Turns a language setting such as "hi+en" into the language list
+        easyocr.Reader expects.
+        """
+        if isinstance(lang, (list, tuple)):
+            return list(lang)
+        return [code.strip() for code in lang.split("+") if code.strip()]
+
+    def get_reader(self, lang):
+        lang_list = self.parse_lang(lang)
+        key = (tuple(lang_list), self.gpu)
+        with _readers_lock:
+            if key not in _readers:
+                log.info(
+                    f"Loading EasyOCR reader for {lang_list}, gpu={self.gpu}"
+                )
+                _readers[key] = easyocr.Reader(
+                    lang_list=lang_list, gpu=self.gpu, verbose=False
+                )
+            return _readers[key]
+
+    def warm_up(self, langs):
+        """
+        Loads the reader of every language set and runs it once on a blank
+        image, so the first card of a worker does not pay for it.
+        """
+        blank = np.full((32, 128), 255, dtype=np.uint8)
+        for lang in langs:
+            self.get_reader(lang).readtext(blank)
+        log.info(f"Warmed up EasyOCR readers for {list(langs)}")
+
+    @staticmethod
+    def _to_text(result):
+        return "\n".join(detection[1] for detection in result)
+
+    def readtext(self, image, lang):
+        result = self.get_reader(lang).readtext(
+            image, batch_size=self.batch_size
+        )
+        return self._to_text(result)
+
+    def readtext_batched(self, images, lang):
+        """
+        Reads many images with one detector pass and batched recognition.
+        The detector needs images of one size, so every image is padded
+        with white to the largest height and width instead of resized.
+        """
+        height = max(image.shape[0] for image in images)
+        width = max(image.shape[1] for image in images)
+        padded = []
+        for image in images:
+            canvas = np.full(
+                (height, width) + image.shape[2:], 255, dtype=np.uint8
+            )
+            canvas[: image.shape[0], : image.shape[1]] = image
+            padded.append(canvas)
+
+        results = self.get_reader(lang).readtext_batched(
+            padded, batch_size=self.batch_size
+        )
+        return [self._to_text(result) for result in results]
@@ -0,0 +1,116 @@
+import re
+from config.config_loader import load_json, load_resource
+from config.settings import FIELD_TEMPLATE_PATH, HIN_ENG_DIGITS_PATH
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+class FieldTemplate:
+    """
+    Fixed field layout of a voter card, loaded from field_template.json.
+
+    Every field gives the box of its value as fractions (x0, y0, x1, y1) of
+    the card width and height, the language to read it in, an optional
+    character whitelist and an optional pattern the value must match.
+    A field with a `label_box` also reads its label, whose first word picks
+    the output key from `label_keys` (father, husband, mother...).
+
+    The boxes are measured on the standard electoral roll card. Cards whose
+    aspect ratio is off, or whose values fail their patterns, do not fit
+    the template and are read by the full-card OCR path instead.
+    """
+
+    def __init__(self, template_path=FIELD_TEMPLATE_PATH):
+        template = load_json(filePath=template_path)
+        self.aspect_ratio = template["aspect_ratio"]
+        self.aspect_ratio_tolerance = template["aspect_ratio_tolerance"]
+        self.psm = template["psm"]
+        self.fields = template["fields"]
+        self._patterns = {
+            name: re.compile(field["pattern"])
+            for name, field in self.fields.items()
+            if field.get("pattern")
+        }
+        self._digits = load_resource(
+            filePath=HIN_ENG_DIGITS_PATH, build=str.maketrans
+        )
+        log.info(f"Loaded field template with {len(self.fields)} fields")
+
+    def fits(self, image):
+        height, width = image.shape[:2]
+        if not height:
+            return False
+        return (
+            abs(width / height - self.aspect_ratio)
+            <= self.aspect_ratio_tolerance
+        )
+
+    @staticmethod
+    def _crop(image, box):
+        height, width = image.shape[:2]
+        x0, y0, x1, y1 = box
+        return image[
+            round(y0 * height) : round(y1 * height),
+            round(x0 * width) : round(x1 * width),
+        ]
+
+    def get_config(self, whitelist=None):
+        config = f"--psm {self.psm}"
+        if whitelist:
+            config += f" -c tessedit_char_whitelist={whitelist}"
+        return config
+
+    def get_regions(self, image):
+        """
+        Returns the regions of a card image to OCR, as
+        (name, part, crop, lang name, whitelist) with part "value" or
+        "label".
+        """
+        regions = []
+        for name, field in self.fields.items():
+            regions.append(
+                (
+                    name,
+                    "value",
+                    self._crop(image, field["box"]),
+                    field["lang"],
+                    field.get("whitelist"),
+                )
+            )
+            if field.get("label_box"):
+                regions.append(
+                    (
+                        name,
+                        "label",
+                        self._crop(image, field["label_box"]),
+                        field["lang"],
+                        field.get("label_whitelist"),
+                    )
+                )
+        return regions
+
+    def _get_key(self, field, label):
+        words = (label or "").split()
+        if not words:
+            return field["key"]
+        return field.get("label_keys", {}).get(words[0], field["key"])
+
+    def build_fields(self, texts):
+        """
+        Turns the text read from each region, keyed by (name, part), into
+        the card's field dict. Returns None when a value fails its
+        pattern, so the card falls back to the full-card path.
+        """
+        fields = {}
+        for name, field in self.fields.items():
+            value = texts.get((name, "value"))
+            value = " ".join((value or "").split()).translate(self._digits)
+            pattern = self._patterns.get(name)
+            if pattern is not None and not pattern.search(value):
+                log.debug(f"Field {name} does not fit the template: {value}")
+                return None
+
+            key = self._get_key(field, texts.get((name, "label")))
+            fields[key] = value or None
+        return fields
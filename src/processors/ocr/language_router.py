@@ -0,0 +1,149 @@
+import threading
+import numpy as np
+import cv2 as cv
+from collections import Counter
+from config.settings import (
+    IMAGE_DPI,
+    POINTS_PER_INCH,
+    ROUTING_HEADLINE_MIN_POINTS,
+    ROUTING_MIN_HEADLINE_RATIO,
+    ROUTING_MIN_LINE_POINTS,
+    ROUTING_LANGS,
+)
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+class LanguageRouter:
+    """
+    Picks the smallest language set for an image region from its pixels.
+
+    Devanagari words hang from a headline (shirorekha) running across the
+    whole word, which Latin text has no equivalent of. Each text line of
+    the region is opened with a horizontal kernel longer than any Latin
+    letter stroke; when a good share of the line's ink survives, the line
+    is Devanagari, otherwise Latin. The region's scripts map to a language
+    key (HINDI, ENGLISH or HIN_ENG) through ROUTING_LANGS, looked up in the
+    OCR engine's Lang table `lang`.
+
+    Card borders and rules are removed first, as they would pass for
+    headlines. `route` is the whole routing decision, so layouts with
+    another split can call it on their own regions, and counts how often
+    each language set is picked.
+    """
+
+    def __init__(
+        self,
+        lang,
+        headline_min_points=ROUTING_HEADLINE_MIN_POINTS,
+        min_headline_ratio=ROUTING_MIN_HEADLINE_RATIO,
+        min_line_points=ROUTING_MIN_LINE_POINTS,
+        langs=ROUTING_LANGS,
+    ):
+        self.headline_min_points = headline_min_points
+        self.min_headline_ratio = min_headline_ratio
+        self.min_line_points = min_line_points
+        self.langs = {
+            scripts: getattr(lang, key) for scripts, key in langs.items()
+        }
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _to_pixels(points, dpi):
+        return max(1, round(points * dpi / POINTS_PER_INCH))
+
+    @staticmethod
+    def _get_ink(image):
+        image = np.asarray(image)
+        if image.ndim == 3:
+            image = cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+        _, ink = cv.threshold(
+            image, 0, 255, cv.THRESH_BINARY_INV + cv.THRESH_OTSU
+        )
+        return ink
+
+    @staticmethod
+    def _remove_rules(ink):
+        """
+        Removes lines running along most of the region, such as the card
+        outline and separators.
+        """
+        height, width = ink.shape
+        for kernel_size in (
+            (max(1, int(width * 0.6)), 1),
+            (1, max(1, int(height * 0.6))),
+        ):
+            rules = cv.morphologyEx(
+                ink,
+                cv.MORPH_OPEN,
+                cv.getStructuringElement(cv.MORPH_RECT, kernel_size),
+            )
+            ink = cv.subtract(ink, rules)
+        return ink
+
+    def _get_lines(self, ink, dpi):
+        """
+        Returns the (top, bottom) rows of the text lines of a region.
+        """
+        min_height = self._to_pixels(self.min_line_points, dpi)
+        has_ink = np.count_nonzero(ink, axis=1) > 0
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], has_ink, [0]))))
+        return [
+            (top, bottom)
+            for top, bottom in zip(edges[::2], edges[1::2])
+            if bottom - top >= min_height
+        ]
+
+    def detect_scripts(self, image, dpi=IMAGE_DPI):
+        """
+        Returns the set of scripts ("devanagari", "latin") found in the
+        text lines of an image rendered at `dpi`.
+        """
+        dpi = dpi or IMAGE_DPI
+        ink = self._remove_rules(self._get_ink(image))
+        kernel = cv.getStructuringElement(
+            cv.MORPH_RECT, (self._to_pixels(self.headline_min_points, dpi), 1)
+        )
+
+        scripts = set()
+        for top, bottom in self._get_lines(ink, dpi):
+            line = ink[top:bottom]
+            headlines = cv.morphologyEx(line, cv.MORPH_OPEN, kernel)
+            ratio = np.count_nonzero(headlines) / np.count_nonzero(line)
+            scripts.add(
+                "devanagari" if ratio >= self.min_headline_ratio else "latin"
+            )
+        return scripts
+
+    def route(self, image, dpi, default):
+        """
+        Returns the language to read an image with, `default` when no text
+        line is found.
+        """
+        scripts = set()
+        if image is not None:
+            scripts = self.detect_scripts(image, dpi)
+        if scripts == {"devanagari"}:
+            lang = self.langs["devanagari"]
+        elif scripts == {"latin"}:
+            lang = self.langs["latin"]
+        elif scripts:
+            lang = self.langs["mixed"]
+        else:
+            lang = default
+        log.debug(f"Routed region with scripts {sorted(scripts)} to {lang}")
+
+        with self._lock:
+            self.counts[lang] += 1
+        return lang
+
+    def pop_counts(self):
+        """
+        Returns how often each language was picked since the last call,
+        and starts counting again.
+        """
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+        return dict(counts)
@@ -0,0 +1,160 @@
+import os
+import time
+import threading
+import uuid
+import hashlib
+import numpy as np
+from pathlib import Path
+from collections import Counter
+from config.settings import (
+    OCR_CACHE_DIR,
+    OCR_CACHE_MAX_BYTES,
+    OCR_CACHE_MAX_AGE_DAYS,
+    OCR_CACHE_EVICT_INTERVAL,
+)
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+class OcrCache:
+    """
+    On-disk cache of OCR results, one UTF-8 text file per result, keyed
+    by a hash of the preprocessed image bytes and the engine, language and
+    config it was read with.
+
+    Like the render cache, files are written to a temporary name and
+    renamed into place, so processes sharing the cache never read a partial
+    result. Entries older than `max_age_days` are dropped, then the least
+    recently used ones while the cache is larger than `max_bytes`. Since
+    that needs a scan of the cache directory, it runs once every
+    `evict_interval` stores rather than on each one.
+
+    The hit and miss counters are shared by the OCR executor threads, so
+    they are updated under a lock.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = OCR_CACHE_DIR,
+        max_bytes: int = OCR_CACHE_MAX_BYTES,
+        max_age_days: float = OCR_CACHE_MAX_AGE_DAYS,
+        evict_interval: int = OCR_CACHE_EVICT_INTERVAL,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.evict_interval = evict_interval
+        self.counts = Counter()
+        self._stores = 0
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def get_key(image, engine, lang, config):
+        """
+        Hashes the pixels, shape and dtype of an image together with the
+        OCR settings that determine what is read from it.
+        """
+        image = np.ascontiguousarray(image)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{engine.value}|{lang}|{config}|".encode("utf-8"))
+        digest.update(f"{image.shape}|{image.dtype}|".encode("utf-8"))
+        digest.update(memoryview(image).cast("B"))
+        return digest.hexdigest()
+
+    def _get_path(self, key):
+        return self.cache_dir / f"{key}.txt"
+
+    def get(self, key):
+        path = self._get_path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self._count("misses")
+            log.debug(f"OCR cache miss: {path.name}")
+            return None
+        except (OSError, UnicodeDecodeError) as e:
+            self._count("misses")
+            log.warning(f"Unreadable OCR cache entry {path.name}: {e}")
+            return None
+
+        # Mark the entry as recently used for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        log.debug(f"OCR cache hit: {path.name}")
+        return text
+
+    def put(self, key, text):
+        if text is None:
+            return
+        path = self._get_path(key)
+        temp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+        try:
+            temp_path.write_text(text, encoding="utf-8")
+            os.replace(temp_path, path)
+            log.debug(f"Stored OCR result in cache: {path.name}")
+        except OSError as e:
+            log.warning(f"Could not store OCR result {path.name}: {e}")
+            temp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._stores += 1
+            evict = self._stores % self.evict_interval == 0
+        if evict:
+            self._evict()
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def pop_counts(self):
+        """
+        Returns the cache hits and misses since the last call, and starts
+        counting again.
+        """
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+        return {"hits": counts["hits"], "misses": counts["misses"]}
+
+    def _evict(self):
+        oldest_mtime = time.time() - self.max_age_days * 24 * 3600
+        entries = []
+        total_bytes = 0
+        expired = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".txt") or entry.name.startswith("."):
+                continue
+            try:
+                stat = entry.stat()
+                if stat.st_mtime < oldest_mtime:
+                    os.remove(entry.path)
+                    expired += 1
+                    continue
+            except OSError:
+                # Removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_bytes += stat.st_size
+
+        if expired:
+            log.info(f"Evicted {expired} expired OCR cache entries")
+        if total_bytes <= self.max_bytes:
+            return
+
+        log.info(
+            f"OCR cache holds {total_bytes} bytes, evicting down to "
+            f"{self.max_bytes} bytes"
+        )
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_bytes -= size
+            except OSError:
+                continue
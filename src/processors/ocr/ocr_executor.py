@@ -0,0 +1,43 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+class OcrExecutor:
+    """
+    Bounded thread pool running OCR calls in the background of a worker.
+
+    Tesseract (and the tesseract subprocess pytesseract waits on) spends
+    its time outside the GIL, so a few threads keep several card halves in
+    recognition while the worker preprocesses the next card. `submit`
+    blocks once `max_pending` calls are queued or running, which keeps the
+    worker from preprocessing far ahead of OCR and holding every card of a
+    page in memory.
+    """
+
+    def __init__(self, max_workers, max_pending):
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ocr"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        log.info(
+            f"OCR executor started with {max_workers} threads, "
+            f"{self.max_pending} pending calls"
+        )
+
+    def submit(self, fn, *args, **kwargs):
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
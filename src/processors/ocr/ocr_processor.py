@@ -1,27 +1,129 @@
+import os
+import re
 import pytesseract
-import easyocr
+from multiprocessing import cpu_count
+from concurrent.futures import Future
 from src.enums.enums import OcrEngine
 from config.config_files.config import OcrProcess
+from config.settings import (
+    POINTS_PER_INCH,
+    OCR_BATCH_SEPARATOR_POINTS,
+    OCR_BATCH_MAX_HEIGHT,
+    USE_OCR_CACHE,
+    USE_OCR_EXECUTOR,
+    OCR_EXECUTOR_THREADS,
+    OCR_EXECUTOR_MAX_PENDING,
+    OCR_OMP_THREAD_LIMIT,
+    USE_LANGUAGE_ROUTING,
+)
+from .stitched_batch import StitchedBatch
+from .ocr_cache import OcrCache
+from .ocr_executor import OcrExecutor
+from .language_router import LanguageRouter
 from src.utils.logger import setup_logger
 
 log = setup_logger(__name__)
 
 
 class OcrProcessor:
-    def __init__(self, ocr_engine):
+    def __init__(
+        self,
+        ocr_engine,
+        use_ocr_cache=USE_OCR_CACHE,
+        ocr_threads=None,
+        ocr_config="FIVE",
+        left_lang="HIN_ENG",
+        right_lang="ENGLISH",
+        use_language_routing=USE_LANGUAGE_ROUTING,
+    ):
         log.info(f"Initializing OCR processor with engine: {ocr_engine}")
         self.ocr_engine = ocr_engine
+        self.ocr_cache = OcrCache() if use_ocr_cache else None
+
+        # ocr_threads=None (the default) runs OCR on the calling thread.
+        # Concurrent Tesseract calls each starting their own OpenMP
+        # threads would oversubscribe the cores, so the OpenMP limit is
+        # set before tesserocr is loaded or tesseract is spawned
+        self.executor = None
+        if ocr_threads:
+            os.environ.setdefault(
+                "OMP_THREAD_LIMIT", str(OCR_OMP_THREAD_LIMIT)
+            )
+            if ocr_engine == OcrEngine.EASYOCR:
+                # Readers are shared by threads and parallelize internally
+                ocr_threads = 1
+            self.executor = OcrExecutor(
+                max_workers=ocr_threads,
+                max_pending=OCR_EXECUTOR_MAX_PENDING,
+            )
 
-        if ocr_engine == OcrEngine.PYTESSERACT:
+        if ocr_engine in (OcrEngine.PYTESSERACT, OcrEngine.TESSEROCR):
             log.debug("Setting up Pytesseract configuration")
             self.config = OcrProcess.Pytesseract.Config
             self.lang = OcrProcess.Pytesseract.Lang
+
+        if ocr_engine == OcrEngine.TESSEROCR:
+            # Imported here so tesserocr is only needed by the workers
+            # that use it
+            from .tesseract_engine import TesseractEngine
+
+            log.debug("Setting up in-process Tesseract engine")
+            self.tesseract_engine = TesseractEngine()
         elif ocr_engine == OcrEngine.EASYOCR:
+            from .easyocr_engine import EasyOcrEngine
+
             log.debug("Setting up EasyOCR configuration")
-            self.config = OcrProcess.Easyocr.Config
+            self.lang = OcrProcess.Easyocr.Lang
+            self.easyocr_engine = EasyOcrEngine()
+
+        # Tesseract config and languages the card sides are read with,
+        # given as keys of the engine's tables
+        self.side_config = ""
+        if ocr_engine in (OcrEngine.PYTESSERACT, OcrEngine.TESSEROCR):
+            self.side_config = getattr(self.config, ocr_config)
+        if ocr_engine != OcrEngine.TENSORFLOW:
+            self.left_lang = getattr(self.lang, left_lang)
+            self.right_lang = getattr(self.lang, right_lang)
+
+        # With routing, the side languages above are only the fallback for
+        # halves whose script could not be detected
+        self.language_router = None
+        if use_language_routing and ocr_engine != OcrEngine.TENSORFLOW:
+            log.debug("Setting up script-aware language routing")
+            self.language_router = LanguageRouter(lang=self.lang)
 
         log.info("OCR processor initialization completed")
 
+    @staticmethod
+    def get_ocr_threads(
+        worker_processes,
+        use_ocr_executor=USE_OCR_EXECUTOR,
+        ocr_threads=OCR_EXECUTOR_THREADS,
+        omp_thread_limit=OCR_OMP_THREAD_LIMIT,
+    ):
+        """
+        Returns the OCR executor size of each of `worker_processes`
+        workers, None when OCR runs on the worker thread, so that all the
+        Tesseract calls in flight on the machine, each running
+        `omp_thread_limit` OpenMP threads, fit the cores.
+        """
+        if not use_ocr_executor:
+            return None
+        if ocr_threads:
+            return ocr_threads
+        return max(
+            1, cpu_count() // (max(1, worker_processes) * omp_thread_limit)
+        )
+
+    def warm_up(self):
+        """
+        Loads the models of the selected engine ahead of the first card,
+        for engines that keep them in the process.
+        """
+        if self.ocr_engine == OcrEngine.EASYOCR:
+            log.info("Warming up EasyOCR readers")
+            self.easyocr_engine.warm_up([self.left_lang, self.right_lang])
+
     def process_ocr(self, image, config, lang):
         """
         Process OCR on the given images using the selected OCR engine.
@@ -36,20 +138,35 @@ class OcrProcessor:
             log.info("Pytesseract OCR processing completed")
             return result
 
+        elif self.ocr_engine == OcrEngine.TESSEROCR:
+            log.debug(f"Using Tesserocr with config: {config}, lang: {lang}")
+            result = self._use_tesserocr(
+                image=image, config=config, lang=lang
+            )
+            log.info("Tesserocr OCR processing completed")
+            return result
+
         elif self.ocr_engine == OcrEngine.EASYOCR:
-            log.debug("Using EasyOCR for processing")
-            result = self._use_easyocr(image)
+            log.debug(f"Using EasyOCR with lang: {lang}")
+            result = self._use_easyocr(image=image, lang=lang)
             log.info("EasyOCR processing completed")
             return result
 
         log.warning(f"Unsupported OCR engine: {self.ocr_engine}")
         return None
 
-    def _use_pytesseract(self, image, config, lang):
+    def _use_pytesseract(self, image, config, lang, word_data=False):
         try:
             log.debug(
                 f"Processing image with Pytesseract config={config}, lang={lang}"
             )
+            if word_data:
+                return pytesseract.image_to_data(
+                    image=image,
+                    config=config,
+                    lang=lang,
+                    output_type=pytesseract.Output.DICT,
+                )
             text = pytesseract.image_to_string(
                 image=image, config=config, lang=lang
             )
@@ -62,25 +179,277 @@ class OcrProcessor:
             log.error(f"Unexpected error during OCR: {e}")
             return None
 
-    def perform_ocr_on_sides(
-        self, left_side, right_side, ocr_engine=OcrEngine.PYTESSERACT
+    def _use_tesserocr(self, image, config, lang, word_data=False):
+        try:
+            log.debug(
+                f"Processing image with Tesserocr config={config}, lang={lang}"
+            )
+            if word_data:
+                return self.tesseract_engine.image_to_data(
+                    image=image, config=config, lang=lang
+                )
+            text = self.tesseract_engine.image_to_string(
+                image=image, config=config, lang=lang
+            )
+            log.info("Successfully extracted text using Tesserocr")
+            return text
+        except RuntimeError as e:
+            log.error(f"Error processing image with tesserocr: {e}")
+            return None
+        except Exception as e:
+            log.error(f"Unexpected error during OCR: {e}")
+            return None
+
+    def _use_tesseract(
+        self, image, config, lang, ocr_engine=None, word_data=False
     ):
+        """
+        Runs Tesseract through the in-process engine or the pytesseract
+        subprocess, depending on the selected OCR engine. With `word_data`
+        it returns the recognized words and their boxes instead of text.
+        Text results are served from and stored in the OCR cache.
+        """
+        ocr_engine = ocr_engine or self.ocr_engine
+        use = (
+            self._use_tesserocr
+            if ocr_engine == OcrEngine.TESSEROCR
+            else self._use_pytesseract
+        )
+        if word_data:
+            return use(
+                image=image, config=config, lang=lang, word_data=word_data
+            )
+
+        return self._cached_read(
+            images=[image],
+            ocr_engine=ocr_engine,
+            lang=lang,
+            config=config,
+            read=lambda images: [
+                use(image=images[0], config=config, lang=lang)
+            ],
+        )[0]
+
+    def _cached_read(self, images, ocr_engine, lang, config, read):
+        """
+        Returns the text of every image, None for missing ones, serving
+        results from the OCR cache and reading the others with `read`,
+        which takes a list of images and returns their texts.
+        """
+        texts = [None] * len(images)
+        cache_keys = [None] * len(images)
+        if self.ocr_cache is not None:
+            for index, image in enumerate(images):
+                if image is None:
+                    continue
+                cache_keys[index] = OcrCache.get_key(
+                    image, ocr_engine, lang, config
+                )
+                texts[index] = self.ocr_cache.get(cache_keys[index])
+
+        misses = [
+            index
+            for index, image in enumerate(images)
+            if image is not None and texts[index] is None
+        ]
+        if not misses:
+            return texts
+
+        miss_texts = read([images[index] for index in misses])
+        for index, text in zip(misses, miss_texts):
+            texts[index] = text
+            if self.ocr_cache is not None:
+                self.ocr_cache.put(cache_keys[index], text)
+        return texts
+
+    @staticmethod
+    def _with_dpi(config, dpi):
+        """
+        Sets the --dpi option of a tesseract config to the resolution of the
+        image being read, leaving the config as is when `dpi` is None.
+        """
+        if dpi is None:
+            return config
+        config = re.sub(r"--dpi\s+\d+", "", config).strip()
+        return f"{config} --dpi {dpi}".strip()
+
+    def _route_lang(self, image, lang, dpi=None):
+        """
+        Returns the language to read an image with: the one matching its
+        script with language routing, `lang` otherwise.
+        """
+        if self.language_router is None or image is None:
+            return lang
+        return self.language_router.route(image=image, dpi=dpi, default=lang)
+
+    def _read_routed(self, images, lang, dpi, read):
+        """
+        Returns the text of every image, reading the images routed to each
+        language together with `read(images, lang)`.
+        """
+        groups = {}
+        for index, image in enumerate(images):
+            image_lang = self._route_lang(image, lang, dpi)
+            groups.setdefault(image_lang, []).append(index)
+
+        texts = [None] * len(images)
+        for group_lang, indexes in groups.items():
+            group_texts = read(
+                [images[index] for index in indexes], group_lang
+            )
+            for index, text in zip(indexes, group_texts):
+                texts[index] = text
+        return texts
+
+    def _read_side(self, image, lang, dpi=None, ocr_engine=None):
+        """
+        Reads one card half with the selected engine, through the OCR
+        cache.
+        """
+        lang = self._route_lang(image, lang, dpi)
+        if (ocr_engine or self.ocr_engine) == OcrEngine.EASYOCR:
+            return self._cached_read(
+                images=[image],
+                ocr_engine=OcrEngine.EASYOCR,
+                lang=lang,
+                config="",
+                read=lambda images: [
+                    self._use_easyocr(image=images[0], lang=lang)
+                ],
+            )[0]
+
+        config = self._with_dpi(self.side_config, dpi)
+        log.debug(f"Using OCR configuration: {config}")
+        return self._use_tesseract(
+            image=image, lang=lang, config=config, ocr_engine=ocr_engine
+        )
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queues `fn` on the OCR executor and returns its future, blocking
+        while the executor is full. Without an executor `fn` runs right
+        away and a done future is returned.
+        """
+        if self.executor is not None:
+            return self.executor.submit(fn, *args, **kwargs)
+
+        future = Future()
         try:
-            log.info("Starting OCR processing on image sides")
-            # OCR configuration
-            config = self.config.FIVE
-            log.debug(f"Using OCR configuration: {config}")
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
 
-            # Apply OCR to each part
-            log.debug("Processing left side with HIN_ENG language")
-            left_text = self._use_pytesseract(
-                image=left_side, lang=self.lang.HIN_ENG, config=config
+    def submit_sides(self, left_side, right_side, ocr_engine=None, dpi=None):
+        """
+        Queues the OCR of both halves of a card on the OCR executor and
+        returns their futures, (left_future, right_future).
+        """
+        return tuple(
+            self.submit(self._read_side, image, lang, dpi, ocr_engine)
+            for image, lang in (
+                (left_side, self.left_lang),
+                (right_side, self.right_lang),
             )
+        )
 
-            log.debug("Processing right side with ENGLISH language")
-            right_text = self._use_pytesseract(
-                image=right_side, lang=self.lang.ENGLISH, config=config
+    @staticmethod
+    def _read_word_data(data):
+        """
+        Returns the text and the mean word confidence (0 to 100) of
+        image_to_data output, laid out like Tesseract's plain text.
+        """
+        lines, confidences = {}, []
+        for position, word in enumerate(data["text"]):
+            if not word or not word.strip():
+                continue
+            key = (
+                data["block_num"][position],
+                data["par_num"][position],
+                data["line_num"][position],
             )
+            lines.setdefault(key, []).append(word.strip())
+            confidence = float(data["conf"][position])
+            if confidence >= 0:
+                confidences.append(confidence)
+
+        text = StitchedBatch.lines_to_text(lines)
+        if not confidences:
+            return text, 0.0
+        return text, sum(confidences) / len(confidences)
+
+    def perform_ocr_on_sides_with_confidence(
+        self, left_side, right_side, ocr_engine=None, dpi=None
+    ):
+        """
+        Reads both halves of a card on the calling thread and returns
+        ((left_text, left_confidence), (right_text, right_confidence)),
+        with None for a half that could not be read. Tesseract engines
+        only, since the confidences come from the word data. Results are
+        served from and stored in the OCR cache.
+        """
+        ocr_engine = ocr_engine or self.ocr_engine
+        config = self._with_dpi(self.side_config, dpi)
+        results = []
+        for image, lang in (
+            (left_side, self.left_lang),
+            (right_side, self.right_lang),
+        ):
+            lang = self._route_lang(image, lang, dpi)
+            # Cached apart from the plain text read of the same image
+            entry = self._cached_read(
+                images=[image],
+                ocr_engine=ocr_engine,
+                lang=lang,
+                config=f"{config}|word_data",
+                read=lambda images: [
+                    self._read_confidence_entry(
+                        images[0], config, lang, ocr_engine
+                    )
+                ],
+            )[0]
+            if entry is None:
+                results.append(None)
+                continue
+            confidence, _, text = entry.partition("\n")
+            results.append((text, float(confidence)))
+        return tuple(results)
+
+    def _read_confidence_entry(self, image, config, lang, ocr_engine):
+        """
+        Reads an image with Tesseract and returns its text and mean word
+        confidence as one OCR cache entry, the confidence on the first
+        line followed by the text.
+        """
+        data = self._use_tesseract(
+            image=image,
+            config=config,
+            lang=lang,
+            ocr_engine=ocr_engine,
+            word_data=True,
+        )
+        if data is None:
+            return None
+        text, confidence = self._read_word_data(data)
+        return f"{confidence!r}\n{text}"
+
+    def perform_ocr_on_sides(
+        self,
+        left_side,
+        right_side,
+        ocr_engine=None,
+        dpi=None,
+    ):
+        try:
+            log.info("Starting OCR processing on image sides")
+            # Both halves are read at once when there is an executor
+            left_future, right_future = self.submit_sides(
+                left_side=left_side,
+                right_side=right_side,
+                ocr_engine=ocr_engine,
+                dpi=dpi,
+            )
+            left_text, right_text = left_future.result(), right_future.result()
 
             log.info("Successfully processed both sides with OCR")
             return left_text, right_text
@@ -89,20 +458,206 @@ class OcrProcessor:
             log.error(f"Error during OCR processing: {e}")
             print(f"An error occurred during image processing: {e}")
 
-    def _use_easyocr(self, image, lang):
+    def perform_ocr_on_fields(
+        self, card_image, field_template, ocr_engine=None, dpi=None
+    ):
+        """
+        Reads the value regions of a card laid out as `field_template`,
+        each as a single text line with its field's character whitelist,
+        and returns the card's field dict, or None when the card does not
+        fit the template and must go through perform_ocr_on_sides.
+        """
+        ocr_engine = ocr_engine or self.ocr_engine
+        if ocr_engine == OcrEngine.EASYOCR:
+            log.debug("Field template OCR needs a Tesseract engine")
+            return None
+        if not field_template.fits(card_image):
+            log.debug("Card shape does not fit the field template")
+            return None
+
+        try:
+            log.info("Starting field template OCR")
+            reads = {}
+            for name, part, crop, lang_name, whitelist in (
+                field_template.get_regions(card_image)
+            ):
+                config = self._with_dpi(
+                    field_template.get_config(whitelist), dpi
+                )
+                reads[(name, part)] = dict(
+                    image=crop,
+                    config=config,
+                    lang=getattr(self.lang, lang_name),
+                    ocr_engine=ocr_engine,
+                )
+
+            if self.executor is None:
+                texts = {
+                    region: self._use_tesseract(**read)
+                    for region, read in reads.items()
+                }
+            else:
+                futures = {
+                    region: self.executor.submit(self._use_tesseract, **read)
+                    for region, read in reads.items()
+                }
+                texts = {
+                    region: future.result()
+                    for region, future in futures.items()
+                }
+            fields = field_template.build_fields(texts)
+            log.info(
+                "Field template OCR completed"
+                if fields is not None
+                else "Card values do not fit the field template"
+            )
+            return fields
+
+        except Exception as e:
+            log.error(f"Error during field template OCR: {e}")
+            return None
+
+    def _ocr_stitched(self, images, config, lang, ocr_engine, dpi):
+        """
+        Returns the text of every image, taken from the OCR cache when
+        possible and read from stitched canvases of the others.
+        """
+        ocr_engine = ocr_engine or self.ocr_engine
+        # Text rebuilt from word data is cached apart from plain text reads
+        return self._cached_read(
+            images=images,
+            ocr_engine=ocr_engine,
+            lang=lang,
+            config=f"{config}|stitched",
+            read=lambda misses: self._read_stitched(
+                images=misses,
+                config=config,
+                lang=lang,
+                ocr_engine=ocr_engine,
+                dpi=dpi,
+            ),
+        )
+
+    def _read_stitched(self, images, config, lang, ocr_engine, dpi):
+        separator_height = round(
+            OCR_BATCH_SEPARATOR_POINTS * (dpi or POINTS_PER_INCH)
+            / POINTS_PER_INCH
+        )
+        batch = StitchedBatch(
+            images=images,
+            separator_height=separator_height,
+            max_height=OCR_BATCH_MAX_HEIGHT,
+        )
+        log.debug(
+            f"Reading {len(images)} images in {len(batch.canvases)} "
+            f"canvases with lang={lang}"
+        )
+        canvas_data = [
+            self._use_tesseract(
+                image=canvas,
+                config=config,
+                lang=lang,
+                ocr_engine=ocr_engine,
+                word_data=True,
+            )
+            for canvas in batch.canvases
+        ]
+        return batch.split_text(canvas_data)
+
+    def perform_batched_ocr_on_sides(
+        self,
+        left_sides,
+        right_sides,
+        ocr_engine=None,
+        dpi=None,
+    ):
+        """
+        OCRs the sides of many cards with one Tesseract call per language
+        (or per canvas, for batches taller than OCR_BATCH_MAX_HEIGHT), or
+        one batched EasyOCR pass per language, and returns the
+        (left_text, right_text) of every card, as perform_ocr_on_sides
+        does for one. Missing sides read as None.
+        """
         try:
-            log.debug(f"Initializing EasyOCR reader with languages: {lang}")
-            reader = easyocr.Reader(lang_list=lang)
+            log.info(f"Starting batched OCR on {len(left_sides)} cards")
+            if (ocr_engine or self.ocr_engine) == OcrEngine.EASYOCR:
+                return self._perform_easyocr_on_sides(
+                    left_sides=left_sides, right_sides=right_sides, dpi=dpi
+                )
+
+            config = self._with_dpi(self.side_config, dpi)
+            log.debug(f"Using OCR configuration: {config}")
+
+            def read(images, lang):
+                log.debug(f"Processing {len(images)} sides with {lang}")
+                return self._ocr_stitched(
+                    images=images,
+                    config=config,
+                    lang=lang,
+                    ocr_engine=ocr_engine,
+                    dpi=dpi,
+                )
 
-            log.debug("Processing image with EasyOCR")
-            result = reader.readtext(image)
+            left_texts = self._read_routed(
+                images=left_sides, lang=self.left_lang, dpi=dpi, read=read
+            )
+            right_texts = self._read_routed(
+                images=right_sides, lang=self.right_lang, dpi=dpi, read=read
+            )
 
-            log.debug("Extracting text from EasyOCR results")
-            detection = "\n".join([det[1] for det in result])
+            log.info("Successfully processed all sides with batched OCR")
+            return list(zip(left_texts, right_texts))
 
+        except Exception as e:
+            log.error(f"Error during batched OCR processing: {e}")
+            return [(None, None)] * len(left_sides)
+
+    def _perform_easyocr_on_sides(self, left_sides, right_sides, dpi=None):
+        def read(images, lang):
+            log.debug(f"Processing {len(images)} sides with lang={lang}")
+            return self._cached_read(
+                images=images,
+                ocr_engine=OcrEngine.EASYOCR,
+                lang=lang,
+                config="",
+                read=lambda misses: self._use_easyocr_batched(
+                    images=misses, lang=lang
+                ),
+            )
+
+        texts = [
+            self._read_routed(images=images, lang=lang, dpi=dpi, read=read)
+            for images, lang in (
+                (left_sides, self.left_lang),
+                (right_sides, self.right_lang),
+            )
+        ]
+        return list(zip(*texts))
+
+    def _use_easyocr(self, image, lang):
+        try:
+            log.debug(f"Processing image with EasyOCR lang={lang}")
+            detection = self.easyocr_engine.readtext(image=image, lang=lang)
             log.info("Successfully completed EasyOCR text extraction")
             return detection
 
         except Exception as e:
             log.error(f"Error during EasyOCR processing: {e}")
             return None
+
+    def _use_easyocr_batched(self, images, lang):
+        try:
+            log.debug(
+                f"Processing {len(images)} images with EasyOCR lang={lang}"
+            )
+            if len(images) == 1:
+                return [self.easyocr_engine.readtext(images[0], lang=lang)]
+            detections = self.easyocr_engine.readtext_batched(
+                images=images, lang=lang
+            )
+            log.info("Successfully completed batched EasyOCR extraction")
+            return detections
+
+        except Exception as e:
+            log.error(f"Error during batched EasyOCR processing: {e}")
+            return [None] * len(images)
@@ -0,0 +1,141 @@
+import numpy as np
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+class StitchedBatch:
+    """
+    Tiles images one below the other into tall canvases, separated by
+    blank bands, so a single OCR call reads all of them, and splits the
+    recognized words back to the image they were read from.
+
+    Images are stacked left aligned and padded to the widest one with the
+    background color. A canvas never grows past `max_height` pixels
+    (Tesseract rejects images with a side over 32767), so large batches
+    are spread over several canvases.
+    """
+
+    def __init__(self, images, separator_height, max_height, background=255):
+        self.separator_height = separator_height
+        self.max_height = max_height
+        self.background = background
+        # Per image: (canvas index, top offset, height), None when missing
+        self.tiles = [None] * len(images)
+        self.canvases = self._stitch(images)
+
+    def _plan(self, images):
+        """
+        Assigns every image to a canvas and returns the image indexes of
+        each canvas.
+        """
+        groups, group, height = [], [], 0
+        for index, image in enumerate(images):
+            if image is None:
+                continue
+            tile_height = image.shape[0] + self.separator_height
+            if group and height + tile_height > self.max_height:
+                groups.append(group)
+                group, height = [], 0
+            group.append(index)
+            height += tile_height
+        if group:
+            groups.append(group)
+        return groups
+
+    def _stitch(self, images):
+        canvases = []
+        for group in self._plan(images):
+            width = max(images[index].shape[1] for index in group)
+            height = sum(
+                images[index].shape[0] + self.separator_height
+                for index in group
+            )
+            canvas = np.full(
+                (height, width) + images[group[0]].shape[2:],
+                self.background,
+                dtype=np.uint8,
+            )
+
+            # The separator leads every tile, so the first one is not
+            # glued to the top border of the canvas either
+            top = 0
+            for index in group:
+                image = images[index]
+                top += self.separator_height
+                tile_height, tile_width = image.shape[:2]
+                canvas[top : top + tile_height, :tile_width] = image
+                self.tiles[index] = (len(canvases), top, tile_height)
+                top += tile_height
+            canvases.append(canvas)
+
+        log.debug(
+            f"Stitched {len(images)} images into {len(canvases)} canvases"
+        )
+        return canvases
+
+    @staticmethod
+    def lines_to_text(lines):
+        """
+        Joins recognized words the way Tesseract lays out its plain text
+        output: words of a line separated by spaces, lines by newlines and
+        paragraphs by an empty line.
+        """
+        text, last_paragraph = "", None
+        for (block_num, par_num, _), words in lines.items():
+            if last_paragraph is not None and last_paragraph != (
+                block_num,
+                par_num,
+            ):
+                text += "\n"
+            text += " ".join(words) + "\n"
+            last_paragraph = (block_num, par_num)
+        return text
+
+    def split_text(self, canvas_data):
+        """
+        Returns the text of every image from the word data (pytesseract
+        image_to_data dict layout) of each canvas, None for the images
+        that were missing or whose canvas could not be read.
+        """
+        lines_per_tile = [
+            None if tile is None else {} for tile in self.tiles
+        ]
+        tiles_per_canvas = {}
+        for index, tile in enumerate(self.tiles):
+            if tile is not None:
+                tiles_per_canvas.setdefault(tile[0], []).append(index)
+
+        for canvas_index, data in enumerate(canvas_data):
+            indexes = tiles_per_canvas.get(canvas_index, [])
+            if data is None:
+                for index in indexes:
+                    lines_per_tile[index] = None
+                continue
+
+            tops = np.array([self.tiles[index][1] for index in indexes])
+            for position, word in enumerate(data["text"]):
+                if not word or not word.strip():
+                    continue
+
+                # A word belongs to the tile its vertical center falls in
+                center = data["top"][position] + data["height"][position] / 2
+                tile_position = np.searchsorted(tops, center, side="right") - 1
+                if tile_position < 0:
+                    continue
+                index = indexes[tile_position]
+                _, top, tile_height = self.tiles[index]
+                if center >= top + tile_height:
+                    continue
+
+                key = (
+                    data["block_num"][position],
+                    data["par_num"][position],
+                    data["line_num"][position],
+                )
+                lines_per_tile[index].setdefault(key, []).append(word.strip())
+
+        return [
+            None if lines is None else self.lines_to_text(lines)
+            for lines in lines_per_tile
+        ]
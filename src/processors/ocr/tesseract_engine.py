@@ -0,0 +1,168 @@
+import re
+import threading
+import numpy as np
+import tesserocr
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+# Tesseract API handles of the current worker, one per language and engine
+# mode, created on first use and kept for the life of the worker, each with
+# the default value of every variable a read has set on it
+_local = threading.local()
+
+
+class TesseractEngine:
+    """
+    In-process Tesseract backend built on the tesserocr bindings.
+
+    Unlike pytesseract, which writes every image to a temporary file and
+    spawns a `tesseract` process that loads the traineddata again, this
+    keeps a long-lived API handle per worker and language configuration and
+    hands it the NumPy buffer directly. Handles are thread-local, so worker
+    processes and threads never share one.
+    """
+
+    _OPTION_PATTERN = re.compile(
+        r"--(psm|oem|dpi)\s+(\d+)|-c\s+([^\s=]+)=(\S+)"
+    )
+
+    @classmethod
+    def parse_config(cls, config):
+        """
+        Splits a tesseract command line config into its page segmentation
+        mode, engine mode, resolution and `-c` variables.
+        """
+        options = {"psm": None, "oem": None, "dpi": None, "variables": {}}
+        for match in cls._OPTION_PATTERN.finditer(config or ""):
+            option, value, name, variable = match.groups()
+            if option:
+                options[option] = int(value)
+            else:
+                options["variables"][name] = variable
+        return options
+
+    @staticmethod
+    def _get_api(lang, oem):
+        apis = getattr(_local, "apis", None)
+        if apis is None:
+            apis = _local.apis = {}
+
+        key = (lang, oem)
+        if key not in apis:
+            log.info(f"Loading Tesseract API for lang={lang}, oem={oem}")
+            if oem is None:
+                api = tesserocr.PyTessBaseAPI(lang=lang)
+            else:
+                api = tesserocr.PyTessBaseAPI(lang=lang, oem=oem)
+            apis[key] = (api, {})
+        return apis[key]
+
+    @staticmethod
+    def close():
+        """
+        Releases the API handles of the current worker.
+        """
+        apis = getattr(_local, "apis", None) or {}
+        for api, _ in apis.values():
+            api.End()
+        apis.clear()
+
+    @staticmethod
+    def _set_variables(api, defaults, variables):
+        """
+        Sets the `-c` variables of a read on a handle. Variables stay set
+        across Clear(), so the ones an earlier read set and this one does
+        not are restored to their default first.
+        """
+        for name, default in defaults.items():
+            if name not in variables:
+                api.SetVariable(name, default)
+        for name, value in variables.items():
+            if name not in defaults:
+                default = api.GetVariableAsString(name)
+                if default is not None:
+                    defaults[name] = default
+            api.SetVariable(name, value)
+
+    def _set_image(self, image, config, lang):
+        options = self.parse_config(config)
+        api, defaults = self._get_api(lang, options["oem"])
+
+        # Tesseract reads the buffer row by row, so slices such as the card
+        # halves are made contiguous first
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+
+        # Handles are shared across configs, so the segmentation mode falls
+        # back to the tesseract command line default when none is given
+        api.Clear()
+        psm = options["psm"]
+        api.SetPageSegMode(tesserocr.PSM.AUTO if psm is None else psm)
+        self._set_variables(api, defaults, options["variables"])
+        api.SetImageBytes(
+            image.tobytes(),
+            width,
+            height,
+            bytes_per_pixel,
+            image.strides[0],
+        )
+        if options["dpi"] is not None:
+            api.SetSourceResolution(options["dpi"])
+        return api
+
+    def image_to_string(self, image, config, lang):
+        api = self._set_image(image=image, config=config, lang=lang)
+        return api.GetUTF8Text()
+
+    def image_to_data(self, image, config, lang):
+        """
+        Returns the recognized words with their boxes in the dict of lists
+        layout of pytesseract.image_to_data, word rows only.
+        """
+        api = self._set_image(image=image, config=config, lang=lang)
+        api.Recognize()
+
+        data = {
+            key: []
+            for key in (
+                "block_num",
+                "par_num",
+                "line_num",
+                "word_num",
+                "left",
+                "top",
+                "width",
+                "height",
+                "conf",
+                "text",
+            )
+        }
+        block_num = par_num = line_num = word_num = 0
+        word_level = tesserocr.RIL.WORD
+        for word in tesserocr.iterate_level(api.GetIterator(), word_level):
+            if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                block_num, par_num = block_num + 1, 0
+            if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                par_num, line_num = par_num + 1, 0
+            if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                line_num, word_num = line_num + 1, 0
+            word_num += 1
+
+            box = word.BoundingBox(word_level)
+            if box is None:
+                continue
+            x0, y0, x1, y1 = box
+            data["block_num"].append(block_num)
+            data["par_num"].append(par_num)
+            data["line_num"].append(line_num)
+            data["word_num"].append(word_num)
+            data["left"].append(x0)
+            data["top"].append(y0)
+            data["width"].append(x1 - x0)
+            data["height"].append(y1 - y0)
+            data["conf"].append(word.Confidence(word_level))
+            data["text"].append(word.GetUTF8Text(word_level) or "")
+        return data
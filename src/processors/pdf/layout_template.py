@@ -0,0 +1,164 @@
+import json
+import math
+from pathlib import Path
+from config.settings import (
+    LAYOUT_TEMPLATE_DIR,
+    LAYOUT_TEMPLATE_LEARN_PAGES,
+    LAYOUT_TEMPLATE_TOLERANCE,
+    LAYOUT_TEMPLATE_MIN_EDGE_DARKNESS,
+    POINTS_PER_INCH,
+    ROI_DETECTION_DPI,
+)
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+class LayoutTemplate:
+    """
+    Card grid shared by the content pages of a roll.
+
+    The grid is learned from the card rectangles (in PDF points) detected
+    on the first pages and, once `learn_pages` consecutive pages agree
+    within `tolerance`, reused on later pages after a cheap check of the
+    card edges on a low DPI render. Learned templates are stored per PDF
+    content hash so later runs on the same roll skip learning.
+    """
+
+    def __init__(
+        self,
+        pdf_reader,
+        learn_pages=LAYOUT_TEMPLATE_LEARN_PAGES,
+        tolerance=LAYOUT_TEMPLATE_TOLERANCE,
+        min_edge_darkness=LAYOUT_TEMPLATE_MIN_EDGE_DARKNESS,
+        template_dir: Path = LAYOUT_TEMPLATE_DIR,
+    ):
+        self.pdf_reader = pdf_reader
+        self.learn_pages = learn_pages
+        self.tolerance = tolerance
+        self.min_edge_darkness = min_edge_darkness
+        self.template_dir = Path(template_dir)
+        self.rects = None
+        self._learned_pages = []
+
+    def _get_path(self):
+        return self.template_dir / f"{self.pdf_reader.file_hash}.json"
+
+    def load(self):
+        path = self._get_path()
+        if not path.exists():
+            return False
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            self.rects = [tuple(rect) for rect in data["rects"]]
+            self.tolerance = data.get("tolerance", self.tolerance)
+            log.info(f"Loaded layout template with {len(self.rects)} cards")
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"Could not load layout template {path}: {e}")
+            return False
+
+    def save(self):
+        path = self._get_path()
+        try:
+            self.template_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(
+                    {"rects": self.rects, "tolerance": self.tolerance}, file
+                )
+            log.info(f"Saved layout template to {path}")
+        except OSError as e:
+            log.warning(f"Could not save layout template {path}: {e}")
+
+    @property
+    def is_ready(self):
+        if self.rects is None:
+            self.load()
+        return self.rects is not None
+
+    def _is_same_grid(self, rects, other_rects):
+        if len(rects) != len(other_rects):
+            return False
+        return all(
+            any(
+                all(
+                    abs(a - b) <= self.tolerance
+                    for a, b in zip(rect, other_rect)
+                )
+                for other_rect in other_rects
+            )
+            for rect in rects
+        )
+
+    def learn(self, card_rects):
+        """
+        Records the cards detected on a page and fixes the template once
+        `learn_pages` consecutive pages have the same grid.
+        """
+        if self.rects is not None or not card_rects:
+            return
+
+        if self._learned_pages and not self._is_same_grid(
+            self._learned_pages[0], card_rects
+        ):
+            log.debug("Card grid differs from previous pages, relearning")
+            self._learned_pages = []
+        self._learned_pages.append(list(card_rects))
+
+        if len(self._learned_pages) >= self.learn_pages:
+            self.rects = self._learned_pages[0]
+            log.info(f"Learned layout template with {len(self.rects)} cards")
+            self.save()
+
+    def _edge_darkness(self, image, position, start, end, band, axis):
+        """
+        Darkness of the darkest line within `band` pixels of `position`,
+        averaged over [start, end) along the edge.
+        """
+        low = max(position - band, 0)
+        high = min(position + band + 1, image.shape[axis])
+        if axis == 0:
+            region = image[low:high, start:end]
+            profile = region.mean(axis=1)
+        else:
+            region = image[start:end, low:high]
+            profile = region.mean(axis=0)
+        if profile.size == 0:
+            return 0
+        return 255 - profile.min()
+
+    def verify(self, pdf, page_num, dpi=ROI_DETECTION_DPI):
+        """
+        Tells whether every template card has its four edges drawn on the
+        page, from the projection profiles of a grayscale render at `dpi`.
+        """
+        image = self.pdf_reader.extract_image_from_pdf(
+            pdf=pdf, page_num=page_num, dpi=dpi
+        )
+        if image is None:
+            return False
+
+        scale = dpi / POINTS_PER_INCH
+        band = math.ceil(self.tolerance * scale) + 1
+        for rect in self.rects:
+            x0, y0, x1, y1 = (round(value * scale) for value in rect)
+            edges = (
+                (y0, x0, x1, 0),
+                (y1, x0, x1, 0),
+                (x0, y0, y1, 1),
+                (x1, y0, y1, 1),
+            )
+            for position, start, end, axis in edges:
+                darkness = self._edge_darkness(
+                    image, position, start, end, band, axis
+                )
+                if darkness < self.min_edge_darkness:
+                    log.info(
+                        f"Layout template rejected on page {page_num}: "
+                        f"card {rect} edge darkness {darkness:.0f}"
+                    )
+                    return False
+
+        log.info(f"Layout template verified on page {page_num}")
+        return True
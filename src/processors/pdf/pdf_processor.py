@@ -1,32 +1,152 @@
+import threading
+from pathlib import Path
+from collections import Counter
+from concurrent.futures import Future
 from multiprocessing import Pool, cpu_count
-from functools import partial
 
 from src.utils.case_converter import CaseConverter
 from .pdf_reader import PdfReader
 from ..image.image_processor import ImageProcessor
+from ..image.preprocessed_image import PreprocessedImage
 from ..ocr.ocr_processor import OcrProcessor
+from ..ocr.field_template import FieldTemplate
 from ..text.text_processor import TextProcessor
-from src.enums.enums import OcrEngine, ImageType
+from ..text.batch_text_processor import BatchTextProcessor
+from .roi_provider import RoiProvider
+from .layout_template import LayoutTemplate
+from src.enums.enums import (
+    OcrEngine,
+    ImageType,
+    ExecutionMode,
+    RenderMode,
+    RoiSource,
+    ExtractionPath,
+    ColorMode,
+    PreprocessMode,
+    ProcessingProfile,
+)
 from config.config_files.config import ImageProcess
-from config.settings import START_PAGE, PAGE_TO_EXCLUDE
+from config.settings import (
+    PDF_PROCESS_CONTROL,
+    START_PAGE,
+    PAGE_TO_EXCLUDE,
+    PDF_EXECUTION_MODE,
+    PAGE_PROCESS_CONTROL,
+    PDF_RENDER_MODE,
+    ROI_SOURCE,
+    USE_EMBEDDED_PHOTOS,
+    USE_TEXT_LAYER,
+    NUM_SECTION,
+    USE_LAYOUT_TEMPLATE,
+    OCR_ENGINE,
+    USE_BATCHED_OCR,
+    USE_FIELD_TEMPLATE,
+    USE_OCR_LADDER,
+    OCR_LADDER_TIERS,
+    OCR_LADDER_MIN_CONFIDENCE,
+    OCR_LADDER_REQUIRED_FIELDS,
+    PROCESSING_PROFILE,
+    PROCESSING_PROFILES,
+    PDF_PROCESSING_PROFILES,
+    USE_BATCHED_TEXT_PROCESSING,
+)
 from src.utils.file_saver import FileSaver
 from src.utils.logger import setup_logger
 
 log = setup_logger(__name__)
 
+# Record key holding the raw (left, right) OCR text of a card until it is
+# post-processed with the other cards of the PDF
+CARD_TEXT_KEY = "_card_text"
+
+
+# Per-process state of a page worker, filled once by the pool initializer
+# so every worker opens the document a single time
+_page_worker = {}
+
+
+def _init_page_worker(pdf_path, ocr_threads, profile):
+    log.info(f"Initializing page worker for: {pdf_path}")
+    processor = PdfProcessor(
+        pdf_path=pdf_path,
+        execution_mode=ExecutionMode.PDF_PARALLEL,
+        ocr_threads=ocr_threads,
+        profile=profile,
+    )
+    _page_worker["processor"] = processor
+    _page_worker["pdf"] = processor.pdf_reader.open_pdf()
+
+
+def _process_page_in_worker(page_num):
+    processor = _page_worker["processor"]
+    return page_num, *processor._process_page(
+        pdf=_page_worker["pdf"], page_num=page_num
+    )
+
 
 class PdfProcessor:
-    def __init__(self, pdf_path):
+    def __init__(
+        self,
+        pdf_path,
+        execution_mode=ExecutionMode(PDF_EXECUTION_MODE),
+        page_workers=PAGE_PROCESS_CONTROL,
+        render_mode=RenderMode(PDF_RENDER_MODE),
+        roi_source=RoiSource(ROI_SOURCE),
+        use_layout_template=USE_LAYOUT_TEMPLATE,
+        ocr_engine=OcrEngine(OCR_ENGINE),
+        batched_ocr=USE_BATCHED_OCR,
+        ocr_threads=None,
+        use_field_template=USE_FIELD_TEMPLATE,
+        use_ocr_ladder=USE_OCR_LADDER,
+        profile=None,
+        batched_text=USE_BATCHED_TEXT_PROCESSING,
+    ):
         log.info(f"Initializing PDF processor for: {pdf_path}")
 
         log.debug("Setting up PDF path")
         self.pdf_path = pdf_path
 
+        self.profile = profile or self.get_profile(pdf_path)
+        profile_settings = PROCESSING_PROFILES[self.profile.value]
+        log.info(f"Using {self.profile} processing profile")
+
+        log.debug(f"Using execution mode {execution_mode}")
+        self.execution_mode = execution_mode
+        self.page_workers = page_workers
+
         log.debug("Initializing PDF reader")
         self.pdf_reader = PdfReader(self.pdf_path)
 
-        log.debug("Setting up OCR processor with Pytesseract engine")
-        self.ocr_processor = OcrProcessor(ocr_engine=OcrEngine.PYTESSERACT)
+        if ocr_threads is None:
+            ocr_threads = OcrProcessor.get_ocr_threads(
+                self._get_worker_processes()
+            )
+        self.ocr_threads = ocr_threads
+
+        log.debug(f"Setting up OCR processor with {ocr_engine} engine")
+        self.ocr_processor = OcrProcessor(
+            ocr_engine=ocr_engine,
+            ocr_threads=ocr_threads,
+            ocr_config=profile_settings["ocr_config"],
+            left_lang=profile_settings["left_lang"],
+            right_lang=profile_settings["right_lang"],
+        )
+        # Page-parallel processors hand the OCR to their page workers,
+        # which warm up their own processors
+        if execution_mode != ExecutionMode.PAGE_PARALLEL:
+            self.ocr_processor.warm_up()
+        self.batched_ocr = batched_ocr
+        self.batch_text_processor = (
+            BatchTextProcessor() if batched_text else None
+        )
+        self.field_template = FieldTemplate() if use_field_template else None
+
+        if use_ocr_ladder and ocr_engine == OcrEngine.EASYOCR:
+            log.warning("OCR ladder needs a Tesseract engine, disabling it")
+            use_ocr_ladder = False
+        self.ocr_tiers = OCR_LADDER_TIERS if use_ocr_ladder else []
+        self._ocr_tier_counts = Counter()
+        self._ocr_tier_lock = threading.Lock()
 
         log.debug("Configuring image processor with processing parameters")
         self.image_processor = ImageProcessor(
@@ -34,37 +154,219 @@ class PdfProcessor:
             edge_detection=ImageProcess.EdgeDetection,
             contours=ImageProcess.Counters,
             contour_area=ImageProcess.ContourArea,
-            de_noise=ImageProcess.DeNoise,
+            de_noise=self._with_overrides(
+                ImageProcess.DeNoise, profile_settings.get("de_noise")
+            ),
             kernel=ImageProcess.Kernel,
             filter2d=ImageProcess.Filter2D,
-            threshold=ImageProcess.Threshold,
+            threshold=self._with_overrides(
+                ImageProcess.Threshold, profile_settings.get("threshold")
+            ),
             morphology=ImageProcess.Morphology,
             erode=ImageProcess.Erode,
             color=ImageProcess.Color,
             color_width=ImageProcess.Border,
+            preprocess_mode=PreprocessMode(
+                profile_settings["preprocess_mode"]
+            ),
+            ocr_dpi=profile_settings["ocr_dpi"],
+        )
+        # Cards are binarized after denoising or only blurred
+        self.denoise = profile_settings["denoise"]
+
+        log.debug(
+            f"Setting up ROI provider with {roi_source} source "
+            f"and {render_mode} render mode"
+        )
+        self.roi_provider = RoiProvider(
+            pdf_reader=self.pdf_reader,
+            image_processor=self.image_processor,
+            render_mode=render_mode,
+            roi_source=roi_source,
+            contour_area=ImageProcess.ContourArea,
+            layout_template=(
+                LayoutTemplate(pdf_reader=self.pdf_reader)
+                if use_layout_template
+                else None
+            ),
         )
         log.info("PDF processor initialization completed")
 
-    def _process_roi_and_extract_text(self, roi_image):
-        log.info("Starting ROI text extraction process")
+    @staticmethod
+    def _with_overrides(config, overrides):
+        """
+        Returns an ImageProcess section with its ProcessRoi values
+        overridden by those of a profile, or the section itself when the
+        profile sets none.
+        """
+        if not overrides:
+            return config
+        process_roi = type("ProcessRoi", (config.ProcessRoi,), overrides)
+        return type(config.__name__, (config,), {"ProcessRoi": process_roi})
+
+    @staticmethod
+    def get_profile(pdf_path):
+        """
+        Returns the processing profile of a PDF, the one listed for its
+        file name in PDF_PROCESSING_PROFILES or PROCESSING_PROFILE.
+        """
+        return ProcessingProfile(
+            PDF_PROCESSING_PROFILES.get(
+                Path(pdf_path).name, PROCESSING_PROFILE
+            )
+        )
 
+    def _get_worker_processes(self):
+        """
+        Number of processes OCR'ing at the same time in this execution
+        mode, which the OCR threads of each one are sized against.
+        """
+        if self.execution_mode == ExecutionMode.PAGE_PARALLEL:
+            return min(self.page_workers, cpu_count())
+        return min(PDF_PROCESS_CONTROL, cpu_count())
+
+    def _prepare_roi(self, roi_image):
         log.debug("Processing ROI image")
-        processed_roi = self.image_processor.process_image(
-            roi_image, type=ImageType.ROI_IMAGE
+        return self.image_processor.process_image(
+            roi_image, type=ImageType.ROI_IMAGE, denoise=self.denoise
+        )
+
+    def _prepare_roi_sides(self, roi_image):
+        processed_roi = self._prepare_roi(roi_image)
+
+        log.debug("Splitting ROI into sides")
+        return self.image_processor.split_roi_into_sides(processed_roi)
+
+    def _ocr_roi(self, roi_image):
+        left_side, right_side = self._prepare_roi_sides(roi_image)
+
+        log.debug("Performing OCR on both sides")
+        return self.ocr_processor.perform_ocr_on_sides(
+            left_side=left_side,
+            right_side=right_side,
+            ocr_engine=self.ocr_processor.ocr_engine,
+            dpi=self.image_processor.get_processing_dpi(),
         )
 
+    @staticmethod
+    def _has_required_fields(fields):
+        return all(fields.get(field) for field in OCR_LADDER_REQUIRED_FIELDS)
+
+    def _read_roi_with_ladder(self, roi_image):
+        """
+        Reads a card with the first OCR tier, moving up the ladder while a
+        side reads below OCR_LADDER_MIN_CONFIDENCE or a required field is
+        missing, and returns the card's fields from the last tier run.
+        Every tier is processed and OCR'd at its own resolution, whatever
+        the preprocess mode of the profile.
+        """
+        roi = PreprocessedImage.wrap(roi_image)
+        for tier in self.ocr_tiers:
+            log.debug(f"Reading ROI with OCR tier {tier['name']}")
+            image = roi
+            if tier["dpi"] != roi.dpi:
+                image = self.image_processor.resample(
+                    roi.gray, roi.dpi, tier["dpi"]
+                )
+            processed_roi = self.image_processor.process_image(
+                image,
+                type=ImageType.ROI_IMAGE,
+                dpi=tier["dpi"],
+                normalize=False,
+                denoise=tier["denoise"],
+            )
+            left_side, right_side = self.image_processor.split_roi_into_sides(
+                processed_roi
+            )
+            sides = self.ocr_processor.perform_ocr_on_sides_with_confidence(
+                left_side=left_side,
+                right_side=right_side,
+                ocr_engine=self.ocr_processor.ocr_engine,
+                dpi=tier["dpi"],
+            )
+
+            fields = self._format_card_text(
+                *(side[0] if side else "" for side in sides)
+            )
+            confidence = min(side[1] if side else 0.0 for side in sides)
+            if (
+                confidence >= OCR_LADDER_MIN_CONFIDENCE
+                and self._has_required_fields(fields)
+            ):
+                break
+            log.debug(
+                f"OCR tier {tier['name']} read the ROI with confidence "
+                f"{confidence:.1f}, escalating"
+            )
+
+        with self._ocr_tier_lock:
+            self._ocr_tier_counts[tier["name"]] += 1
+        return fields
+
+    def _submit_roi(self, roi_image):
+        """
+        Preprocesses a ROI and reads it with the field template when it
+        fits, returning its field dict, or queues the OCR of its sides,
+        returning the (left, right) futures. With the OCR ladder the whole
+        card is queued instead, returning one future of its fields.
+        """
+        if self.ocr_tiers:
+            return self.ocr_processor.submit(
+                self._read_roi_with_ladder, roi_image
+            )
+
+        processed_roi = self._prepare_roi(roi_image)
+        dpi = self.image_processor.get_processing_dpi()
+
+        if self.field_template is not None:
+            fields = self.ocr_processor.perform_ocr_on_fields(
+                card_image=processed_roi,
+                field_template=self.field_template,
+                ocr_engine=self.ocr_processor.ocr_engine,
+                dpi=dpi,
+            )
+            if fields is not None:
+                return fields
+            log.debug("Falling back to full-card OCR")
+
         log.debug("Splitting ROI into sides")
         left_side, right_side = self.image_processor.split_roi_into_sides(
             processed_roi
         )
 
-        log.debug("Performing OCR on both sides")
-        left_text, right_text = self.ocr_processor.perform_ocr_on_sides(
+        log.debug("Submitting OCR of both sides")
+        return self.ocr_processor.submit_sides(
             left_side=left_side,
             right_side=right_side,
-            ocr_engine=OcrEngine.PYTESSERACT,
+            ocr_engine=self.ocr_processor.ocr_engine,
+            dpi=dpi,
         )
 
+    def _ocr_rois_batched(self, roi_images):
+        """
+        Returns the (left, right) OCR text of every ROI, read with one
+        stitched OCR call per side instead of one call per card half.
+        """
+        left_sides, right_sides = [], []
+        for roi_image in roi_images:
+            try:
+                left_side, right_side = self._prepare_roi_sides(roi_image)
+            except Exception as e:
+                log.error(f"Error preparing ROI for batched OCR: {e}")
+                left_side = right_side = None
+            left_sides.append(left_side)
+            right_sides.append(right_side)
+
+        log.debug(f"Performing batched OCR on {len(roi_images)} ROIs")
+        return self.ocr_processor.perform_batched_ocr_on_sides(
+            left_sides=left_sides,
+            right_sides=right_sides,
+            ocr_engine=self.ocr_processor.ocr_engine,
+            dpi=self.image_processor.get_processing_dpi(),
+        )
+
+    @staticmethod
+    def _format_card_text(left_text, right_text):
         log.debug("Processing left side text")
         left_text = TextProcessor.format_text(left_text)
 
@@ -74,19 +376,205 @@ class PdfProcessor:
         log.debug("Merging text from both sides")
         text = {**left_text, **right_text}
         log.debug("Standardizing field names")
-        text = TextProcessor.standardize_field_name(user_dict=text)
+        return TextProcessor.standardize_field_name(user_dict=text)
+
+    def _process_roi_and_extract_text(self, roi_image, card_text=None):
+        log.info("Starting ROI text extraction process")
+
+        if card_text is None:
+            left_text, right_text = self._ocr_roi(roi_image=roi_image)
+        else:
+            log.debug("Using already extracted text of the card")
+            left_text, right_text = card_text
+
+        text = self._format_card_text(left_text, right_text)
         log.info("Successfully completed ROI text extraction")
         return text
 
+    def _extract_card_texts(self, pdf, page_num, card_rects):
+        """
+        Returns the (left, right) text layer of every card when the page
+        carries trustworthy embedded text, or None when it must be OCR'd.
+        """
+        if not USE_TEXT_LAYER or not card_rects:
+            return None
+
+        if not self.pdf_reader.probe_text_layer(pdf=pdf, page_num=page_num):
+            return None
+
+        card_texts = []
+        for card_rect in card_rects:
+            sides = self.pdf_reader.extract_card_text(
+                pdf=pdf, page_num=page_num, card_rect=card_rect
+            )
+            if sides is None:
+                log.warning(
+                    f"Text layer of a card on page {page_num} unreadable, "
+                    "falling back to OCR for the page"
+                )
+                return None
+            card_texts.append(tuple(sides))
+        return card_texts
+
+    @staticmethod
+    def _is_passport_placement(image_rect, card_rect, passport_box):
+        x0, y0, x1, y1 = image_rect
+        cx0, cy0, cx1, cy1 = card_rect
+        width, height = x1 - x0, y1 - y0
+        if width <= 0 or height <= 0:
+            return False
+
+        area_ratio = (width * height) / ((cx1 - cx0) * (cy1 - cy0))
+        return (
+            passport_box.MIN_AREA_RATIO
+            < area_ratio
+            < passport_box.MAX_AREA_RATIO
+            and passport_box.MIN_ASPECT_RATIO
+            < width / height
+            < passport_box.MAX_ASPECT_RATIO
+        )
+
+    @staticmethod
+    def _overlap_area(rect, other):
+        width = min(rect[2], other[2]) - max(rect[0], other[0])
+        height = min(rect[3], other[3]) - max(rect[1], other[1])
+        return width * height if width > 0 and height > 0 else 0
+
+    def _extract_embedded_photos(self, pdf, page_num, card_rects):
+        """
+        Matches the images embedded in a page to the cards they sit on and
+        returns, per card, the original image bytes in base64 format, or
+        None for cards without a passport-sized embedded image.
+        """
+        if not card_rects:
+            return []
+
+        photos = [None] * len(card_rects)
+        if not USE_EMBEDDED_PHOTOS:
+            return photos
+
+        images = self.pdf_reader.extract_embedded_images(
+            pdf=pdf, page_num=page_num
+        )
+        if not images:
+            return photos
+
+        passport_box = ImageProcess.ContourArea.PassportBox
+        for index, card_rect in enumerate(card_rects):
+            candidates = [
+                (self._overlap_area(image_rect, card_rect), xref)
+                for xref, image_rect in images
+                if self._is_passport_placement(
+                    image_rect, card_rect, passport_box
+                )
+            ]
+            candidates = [item for item in candidates if item[0] > 0]
+            if not candidates:
+                continue
+
+            _, xref = max(candidates)
+            image_bytes, ext = self.pdf_reader.extract_image_bytes(
+                pdf=pdf, xref=xref
+            )
+            if image_bytes:
+                photos[index] = ImageProcessor.image_to_base64(
+                    image_bytes, ext=f".{ext}"
+                )
+
+        log.info(
+            f"Matched {sum(photo is not None for photo in photos)} of "
+            f"{len(card_rects)} cards to embedded photos on page {page_num}"
+        )
+        return photos
+
+    def _detect_photo_on_card(self, pdf, page_num, card_rect):
+        # Contour detection needs the card in color, pages are otherwise
+        # rendered in grayscale
+        card_image = self.pdf_reader.extract_image_from_pdf(
+            pdf=pdf,
+            page_num=page_num,
+            clip=card_rect,
+            color_mode=ColorMode.RGB,
+        )
+        if card_image is None:
+            return None
+
+        result = self.image_processor.extract_passport_image_in_base64_format(
+            roi=card_image
+        )
+        if not result:
+            return None
+        is_photo_detected, image = result
+        return image if is_photo_detected else None
+
+    def _extract_photos(self, pdf, page_num, card_rects):
+        """
+        Returns the passport photo of every card in base64 format, taken
+        from the embedded images when possible and detected on a color
+        render of the card otherwise, or None when no photo is found.
+        """
+        photos = self._extract_embedded_photos(
+            pdf=pdf, page_num=page_num, card_rects=card_rects
+        )
+        for index, card_rect in enumerate(card_rects or []):
+            if photos[index] is None:
+                log.debug("Attempting to detect passport image on card")
+                photos[index] = self._detect_photo_on_card(
+                    pdf=pdf, page_num=page_num, card_rect=card_rect
+                )
+        return photos
+
     def extract_information_from_all_roi(
-        self, roi_images, image_processor: ImageProcessor
+        self,
+        roi_images,
+        image_processor: ImageProcessor,
+        photos=None,
+        card_texts=None,
     ):
+        """
+        Extracts the voter information of every ROI. `photos` holds the
+        already extracted passport photo per ROI (None where there is
+        none); without it the photo is detected on the ROI image itself.
+        """
         log.info("Starting information extraction from ROIs")
         data = []
+        card_texts = card_texts or [None] * len(roi_images)
+
+        # The OCR of every card without text is queued first, the executor
+        # blocks once it is full, so preprocessing a card overlaps with the
+        # OCR of the cards before it
+        ocr_futures = [
+            self._submit_roi(roi) if card_text is None else None
+            for roi, card_text in zip(roi_images, card_texts)
+        ]
 
-        for roi in roi_images:
+        for index, (roi, card_text) in enumerate(zip(roi_images, card_texts)):
             log.debug("Processing individual ROI")
-            text = self._process_roi_and_extract_text(roi_image=roi)
+            ocr_result = ocr_futures[index]
+            if isinstance(ocr_result, Future):
+                ocr_result = ocr_result.result()
+            if isinstance(ocr_result, dict):
+                log.debug("Using fields already read from the card")
+                text = ocr_result
+            else:
+                if ocr_result is not None:
+                    card_text = tuple(
+                        future.result() for future in ocr_result
+                    )
+                if self.batch_text_processor is not None:
+                    # Post-processed with the whole PDF in _process_pdf
+                    text = {CARD_TEXT_KEY: card_text or (None, None)}
+                else:
+                    text = self._process_roi_and_extract_text(
+                        roi_image=roi, card_text=card_text
+                    )
+
+            if photos is not None:
+                if photos[index] is not None:
+                    log.info("Passport photo extracted")
+                    text["image"] = photos[index]
+                data.append(text)
+                continue
 
             log.debug("Attempting to extract passport image")
             is_photo_detected, image = (
@@ -104,89 +592,200 @@ class PdfProcessor:
         log.info(f"Completed processing {len(roi_images)} ROIs")
         return data
 
-    def _process_single_page(self, args):
-        pdf_path, page_num, config = args
-
-        # Create new instances for each process
-        pdf_reader = PdfReader(pdf_path)
-        image_processor = ImageProcessor(
-            blur=config.Blur,
-            edge_detection=config.EdgeDetection,
-            contours=config.Counters,
-            contour_area=config.ContourArea,
-            de_noise=config.DeNoise,
-            kernel=config.Kernel,
-            filter2d=config.Filter2D,
-            threshold=config.Threshold,
-            morphology=config.Morphology,
-            erode=config.Erode,
-            color=config.Color,
-            color_width=config.Border,
-        )
-
-        # Get PDF object for this process
-        pdf = pdf_reader.process_pdf(lambda x: x)
-        image = pdf_reader.extract_image_from_pdf(pdf=pdf, page_num=page_num)
-        roi_images = image_processor.extract_roi_from_image(image=image)
-        return self.extract_information_from_all_roi(
-            roi_images=roi_images, image_processor=image_processor
-        )
-
-    # def _process_pdf(self, pdf, start_page, pages_to_exclude):
-    #     voter_data = []
-
-    #     if pdf:
-    #         log.info(
-    #             f"Processing pages from {start_page} to {pdf.page_count - pages_to_exclude}"
-    #         )
-
-    #         # Pass pdf_path instead of pdf_reader instance
-    #         page_args = [
-    #             (self.pdf_path, page_num, ImageProcess)
-    #             for page_num in range(
-    #                 start_page, pdf.page_count - pages_to_exclude
-    #             )
-    #         ]
-
-    #         with Pool(processes=cpu_count()) as pool:
-    #             # Use partial to bind self to the method
-    #             bound_process = partial(self._process_single_page)
-    #             voter_data = pool.map(bound_process, page_args)
-
-    #         log.info(f"Successfully processed {len(voter_data)} pages")
-    #         FileSaver.save_data(data=voter_data, file_name="voter_data")
-    #     log.info("Voter data saved successfully")
+    def _process_page(self, pdf, page_num):
+        log.debug(f"Processing page {page_num}")
+        self._ocr_tier_counts = Counter()
+
+        log.debug(f"Extracting ROIs from page {page_num}")
+        card_rects, roi_images = self.roi_provider.get_rois(
+            pdf=pdf, page_num=page_num
+        )
+
+        log.debug(f"Extracting passport photos from page {page_num}")
+        photos = self._extract_photos(
+            pdf=pdf, page_num=page_num, card_rects=card_rects
+        )
+
+        log.debug(f"Probing text layer of page {page_num}")
+        card_texts = self._extract_card_texts(
+            pdf=pdf, page_num=page_num, card_rects=card_rects
+        )
+        extraction_path = (
+            ExtractionPath.OCR
+            if card_texts is None
+            else ExtractionPath.TEXT_LAYER
+        )
+        log.info(f"Page {page_num} takes the {extraction_path} path")
+
+        if card_texts is None and self.batched_ocr and roi_images:
+            log.debug(f"Batching OCR of the ROIs on page {page_num}")
+            card_texts = self._ocr_rois_batched(roi_images=roi_images)
+
+        log.debug(f"Extracting information from ROIs on page {page_num}")
+        data = self.extract_information_from_all_roi(
+            roi_images=roi_images,
+            image_processor=self.image_processor,
+            photos=photos,
+            card_texts=card_texts,
+        )
+
+        # Languages the router picked for the cards of this page
+        language_router = self.ocr_processor.language_router
+        ocr_langs = (
+            language_router.pop_counts() if language_router is not None else {}
+        )
+        # OCR cache hits and misses of the cards of this page
+        ocr_cache = self.ocr_processor.ocr_cache
+        ocr_cache_counts = (
+            ocr_cache.pop_counts() if ocr_cache is not None else {}
+        )
+        return (
+            data,
+            extraction_path,
+            dict(self._ocr_tier_counts),
+            ocr_langs,
+            ocr_cache_counts,
+        )
+
+    def _process_pages_sequentially(self, pdf, page_nums):
+        log.info(f"Processing {len(page_nums)} pages sequentially")
+        return [
+            (page_num, *self._process_page(pdf=pdf, page_num=page_num))
+            for page_num in page_nums
+        ]
+
+    def _process_pages_in_parallel(self, page_nums):
+        num_workers = min(self.page_workers, cpu_count(), len(page_nums))
+        if num_workers < 1:
+            log.warning("No pages to process")
+            return []
+
+        log.info(
+            f"Processing {len(page_nums)} pages with {num_workers} page workers"
+        )
+        with Pool(
+            processes=num_workers,
+            initializer=_init_page_worker,
+            initargs=(self.pdf_path, self.ocr_threads, self.profile),
+        ) as pool:
+            return list(
+                pool.imap_unordered(_process_page_in_worker, page_nums)
+            )
+
+    @staticmethod
+    def _merge_page_results(page_results):
+        log.debug(f"Merging results of {len(page_results)} pages")
+        voter_data = []
+        for _, data, *_ in sorted(
+            page_results, key=lambda result: result[0]
+        ):
+            voter_data.extend(data)
+        return voter_data
+
+    def _format_card_texts_batched(self, voter_data):
+        """
+        Replaces the raw OCR text of the records by the fields read from
+        it, post-processing every card of the PDF in one batch.
+        """
+        indexes = [
+            index
+            for index, record in enumerate(voter_data)
+            if CARD_TEXT_KEY in record
+        ]
+        if not indexes:
+            return voter_data
+
+        card_texts = [voter_data[index][CARD_TEXT_KEY] for index in indexes]
+        fields = self.batch_text_processor.format_cards(
+            left_texts=[left_text for left_text, _ in card_texts],
+            right_texts=[right_text for _, right_text in card_texts],
+        )
+        for index, card_fields in zip(indexes, fields):
+            record = voter_data[index]
+            del record[CARD_TEXT_KEY]
+            voter_data[index] = {**card_fields, **record}
+        return voter_data
+
+    def _log_extraction_summary(self, page_results):
+        text_layer_pages = [
+            page_num
+            for page_num, _, path, *_ in page_results
+            if path == ExtractionPath.TEXT_LAYER
+        ]
+        skipped_cards = sum(
+            len(data)
+            for _, data, path, *_ in page_results
+            if path == ExtractionPath.TEXT_LAYER
+        )
+        log.info(
+            f"{self.pdf_path}: {len(text_layer_pages)} of {len(page_results)} "
+            f"pages read from the text layer {sorted(text_layer_pages)}, "
+            f"skipping OCR for {skipped_cards} cards "
+            f"({skipped_cards * NUM_SECTION} OCR calls)"
+        )
+
+        if self.ocr_tiers:
+            tier_counts = Counter()
+            for _, _, _, ocr_tiers, *_ in page_results:
+                tier_counts.update(ocr_tiers)
+            log.info(
+                f"{self.pdf_path}: OCR tier hits "
+                + ", ".join(
+                    f"{tier['name']} {tier_counts[tier['name']]}"
+                    for tier in self.ocr_tiers
+                )
+            )
+
+        if self.ocr_processor.ocr_cache is not None:
+            cache_counts = Counter()
+            for *_, ocr_cache_counts in page_results:
+                cache_counts.update(ocr_cache_counts)
+            lookups = cache_counts["hits"] + cache_counts["misses"]
+            hit_ratio = cache_counts["hits"] / lookups if lookups else 0.0
+            log.info(
+                f"{self.pdf_path}: OCR cache {cache_counts['hits']} hits, "
+                f"{cache_counts['misses']} misses "
+                f"({hit_ratio:.0%} hit ratio)"
+            )
+
+        if self.ocr_processor.language_router is not None:
+            lang_counts = Counter()
+            for _, _, _, _, ocr_langs, _ in page_results:
+                lang_counts.update(ocr_langs)
+            log.info(
+                f"{self.pdf_path}: OCR languages routed "
+                + ", ".join(
+                    f"{lang} {count}"
+                    for lang, count in lang_counts.most_common()
+                )
+            )
 
     def _process_pdf(self, pdf, start_page, pages_to_exclude):
         pdf_reader = self.pdf_reader
-        image_processor = self.image_processor
-        voter_data = []
         if pdf:
             log.info(
                 f"Processing pages from {start_page} to {pdf.page_count - pages_to_exclude}"
             )
-            for page_num in range(
-                start_page, pdf.page_count - pages_to_exclude
-            ):
-                log.debug(f"Processing page {page_num}")
+            page_nums = range(start_page, pdf.page_count - pages_to_exclude)
 
-                image = pdf_reader.extract_image_from_pdf(
-                    pdf=pdf, page_num=page_num
-                )
-                log.debug(f"Extracting ROIs from page {page_num}")
-                roi_images = image_processor.extract_roi_from_image(
-                    image=image
+            if self.execution_mode == ExecutionMode.PAGE_PARALLEL:
+                page_results = self._process_pages_in_parallel(page_nums)
+            else:
+                page_results = self._process_pages_sequentially(
+                    pdf=pdf, page_nums=page_nums
                 )
+            voter_data = self._merge_page_results(page_results)
+            self._log_extraction_summary(page_results)
 
-                log.debug(
-                    f"Extracting information from ROIs on page {page_num}"
-                )
-                data = self.extract_information_from_all_roi(
-                    roi_images=roi_images, image_processor=image_processor
-                )
-                voter_data.extend(data)
+            if self.batch_text_processor is not None:
+                log.info(f"Post-processing text of {len(voter_data)} cards")
+                voter_data = self._format_card_texts_batched(voter_data)
+
+            # Every record carries the profile it was read with
+            for record in voter_data:
+                record["processing_profile"] = self.profile.value
 
-            log.info(f"Successfully processed {len(voter_data)} pages")
+            log.info(f"Successfully processed {len(page_results)} pages")
             file_name = pdf_reader.get_filename()
             file_name = CaseConverter.to_upper_snake_case(file_name)
             FileSaver.save_data(data=voter_data, file_name=file_name)
@@ -1,17 +1,55 @@
 import fitz
-from PIL import Image
-from config.settings import IMAGE_DPI, IMAGE_MODE
+from config.settings import (
+    IMAGE_DPI,
+    IMAGE_COLOR_MODE,
+    NUM_SECTION,
+    TEXT_LAYER_MIN_CHARS,
+    TEXT_LAYER_MIN_VALID_RATIO,
+    TEXT_LAYER_MIN_DEVANAGARI_RATIO,
+    TEXT_LAYER_MAX_BROKEN_WORD_RATIO,
+    USE_RENDER_CACHE,
+)
 import numpy as np
+from src.processors.pdf.render_cache import RenderCache
 from src.utils.logger import setup_logger
-from src.utils.utils import get_filename_part
-from src.enums.enums import FileNamePart
+from src.utils.utils import get_filename_part, get_file_digest
+from src.enums.enums import FileNamePart, ColorMode
 
 log = setup_logger(__name__)
 
+DEVANAGARI_BLOCK = range(0x0900, 0x0980)
+# Vowel signs, virama and nukta, which can never start a Devanagari word
+DEVANAGARI_DEPENDENT_SIGNS = set(range(0x0900, 0x0904)) | set(
+    range(0x093A, 0x0950)
+)
+
+
+class PixmapArray(np.ndarray):
+    """
+    NumPy array sharing the sample buffer of a pixmap. The buffer is freed
+    with the pixmap, so the array (and every view taken from it) holds a
+    reference to the pixmap.
+    """
+
+    def __array_finalize__(self, obj):
+        self.pixmap = getattr(obj, "pixmap", None)
+
 
 class PdfReader:
-    def __init__(self, file_path):
+    def __init__(self, file_path, use_render_cache=USE_RENDER_CACHE):
         self.file_path = file_path
+        self.render_cache = RenderCache() if use_render_cache else None
+        self._file_hash = None
+
+    @property
+    def file_hash(self):
+        """
+        Content hash of the PDF, computed once, so renders cached for a
+        file stay valid when it is renamed and are dropped when it changes.
+        """
+        if self._file_hash is None:
+            self._file_hash = get_file_digest(self.file_path)
+        return self._file_hash
 
     def process_pdf(self, process_func):
         log.info(f"Starting to read PDF file: {self.file_path}")
@@ -33,6 +71,28 @@ class PdfReader:
             log.error(f"Error reading PDF file {self.file_path}: {str(e)}")
             return None
 
+    def open_pdf(self):
+        """
+        Opens the PDF and returns the document without closing it, for
+        callers (e.g. page workers) that keep one document open across
+        many pages. The caller owns the document and must close it.
+        """
+        log.info(f"Opening PDF file for reuse: {self.file_path}")
+        try:
+            pdf = fitz.open(self.file_path)
+            log.info(f"Successfully opened PDF with {pdf.page_count} pages")
+            return pdf
+
+        except fitz.FileDataError:
+            log.error(f"Invalid or corrupted PDF file: {self.file_path}")
+            return None
+        except FileNotFoundError:
+            log.error(f"PDF file not found: {self.file_path}")
+            return None
+        except Exception as e:
+            log.error(f"Error opening PDF file {self.file_path}: {str(e)}")
+            return None
+
     def _get_page_from_pdf(self, pdf, page_num):
         log.info(f"Getting page {page_num} from PDF")
         try:
@@ -51,9 +111,52 @@ class PdfReader:
             log.error(f"Error accessing page {page_num}: {str(e)}")
             return None
 
-    def extract_image_from_pdf(self, pdf, page_num):
+    @staticmethod
+    def _pixmap_to_array(pix):
+        """
+        Wraps the pixmap samples as a (height, width) array for grayscale
+        and (height, width, channels) otherwise, without copying them.
+        """
+        shape = (pix.height, pix.width, pix.n)
+        strides = (pix.stride, pix.n, 1)
+        image = PixmapArray(
+            shape=shape, dtype=np.uint8, buffer=pix.samples_mv, strides=strides
+        )
+        image.pixmap = pix
+        return image[:, :, 0] if pix.n == 1 else image
+
+    def extract_image_from_pdf(
+        self,
+        pdf,
+        page_num,
+        dpi=IMAGE_DPI,
+        clip=None,
+        color_mode=ColorMode(IMAGE_COLOR_MODE),
+    ):
+        """
+        Renders a page (or only the `clip` rectangle of it, given in PDF
+        points) at `dpi` and returns it as a numpy array over the pixmap
+        buffer: 2D for ColorMode.GRAY, RGB channels for ColorMode.RGB.
+
+        With the render cache enabled, a page rendered before is returned
+        as a read-only memory-mapped array instead of being rendered again.
+        """
         log.info(f"Starting image extraction from page {page_num}")
         try:
+            cache_key = None
+            if self.render_cache is not None:
+                cache_key = dict(
+                    file_hash=self.file_hash,
+                    page_num=page_num,
+                    dpi=dpi,
+                    color_mode=color_mode,
+                    clip=tuple(clip) if clip is not None else None,
+                )
+                cached = self.render_cache.get(**cache_key)
+                if cached is not None:
+                    log.info(f"Served page {page_num} from render cache")
+                    return cached
+
             log.debug(f"Getting page {page_num} from PDF")
             page = self._get_page_from_pdf(pdf=pdf, page_num=page_num)
 
@@ -61,16 +164,21 @@ class PdfReader:
                 log.error(f"Failed to get page {page_num}")
                 return None
 
-            log.debug(f"Creating pixmap with DPI={IMAGE_DPI}")
-            pix = page.get_pixmap(dpi=IMAGE_DPI)
-
-            log.debug(f"Converting pixmap to image with mode {IMAGE_MODE}")
-            img = Image.frombytes(
-                IMAGE_MODE, [pix.width, pix.height], pix.samples
+            colorspace = (
+                fitz.csGRAY if color_mode == ColorMode.GRAY else fitz.csRGB
+            )
+            log.debug(
+                f"Creating {color_mode} pixmap with DPI={dpi}, clip={clip}"
             )
+            pix = page.get_pixmap(
+                dpi=dpi, clip=clip, colorspace=colorspace, alpha=False
+            )
+
+            log.debug("Wrapping pixmap samples as numpy array")
+            img_np = self._pixmap_to_array(pix)
 
-            log.debug("Converting image to numpy array")
-            img_np = np.array(img)
+            if cache_key is not None:
+                self.render_cache.put(image=img_np, **cache_key)
 
             log.info("Successfully extracted image from PDF")
             return img_np
@@ -87,6 +195,204 @@ class PdfReader:
             )
             return None
 
+    @staticmethod
+    def _is_axis_aligned_line(item):
+        _, start, end = item[:3]
+        return start.x == end.x or start.y == end.y
+
+    def extract_rects_from_drawings(self, pdf, page_num):
+        """
+        Returns the (x0, y0, x1, y1) rectangles, in PDF points, drawn on a
+        page as vector paths: rectangle operators and closed outlines made
+        of axis-aligned lines. Rectangles are grown by half the stroke
+        width so they match the outer edge seen on a rendered page.
+        """
+        log.info(f"Reading vector rectangles from page {page_num}")
+        try:
+            page = self._get_page_from_pdf(pdf=pdf, page_num=page_num)
+
+            if page is None:
+                log.error(f"Failed to get page {page_num}")
+                return None
+
+            rects = []
+            for path in page.get_drawings():
+                half_width = (path.get("width") or 0) / 2
+                items = path["items"]
+                if all(item[0] == "l" for item in items) and all(
+                    self._is_axis_aligned_line(item) for item in items
+                ):
+                    candidates = [path["rect"]] if len(items) >= 4 else []
+                else:
+                    candidates = [item[1] for item in items if item[0] == "re"]
+
+                for rect in candidates:
+                    rects.append(
+                        (
+                            rect.x0 - half_width,
+                            rect.y0 - half_width,
+                            rect.x1 + half_width,
+                            rect.y1 + half_width,
+                        )
+                    )
+
+            log.info(f"Found {len(rects)} vector rectangles")
+            return rects
+
+        except Exception as e:
+            log.error(
+                f"Error reading drawings from PDF page {page_num}: {str(e)}"
+            )
+            return None
+
+    def extract_embedded_images(self, pdf, page_num):
+        """
+        Returns the raster images embedded in a page as a list of
+        (xref, (x0, y0, x1, y1)) tuples, the rectangle being where the image
+        is placed on the page, in PDF points. Inline images, which have no
+        xref to extract them from, are skipped.
+        """
+        log.info(f"Reading embedded images from page {page_num}")
+        try:
+            page = self._get_page_from_pdf(pdf=pdf, page_num=page_num)
+
+            if page is None:
+                log.error(f"Failed to get page {page_num}")
+                return None
+
+            images = [
+                (info["xref"], tuple(info["bbox"]))
+                for info in page.get_image_info(xrefs=True)
+                if info.get("xref")
+            ]
+            log.info(f"Found {len(images)} embedded images")
+            return images
+
+        except Exception as e:
+            log.error(
+                f"Error reading images from PDF page {page_num}: {str(e)}"
+            )
+            return None
+
+    def extract_image_bytes(self, pdf, xref):
+        """
+        Returns the stored bytes of an embedded image and their file
+        extension (e.g. "jpeg", "png"), without decoding or re-encoding.
+        """
+        log.debug(f"Extracting embedded image xref={xref}")
+        try:
+            image = pdf.extract_image(xref)
+            if not image:
+                log.error(f"No image found for xref={xref}")
+                return None, None
+            return image["image"], image["ext"]
+
+        except Exception as e:
+            log.error(f"Error extracting image xref={xref}: {str(e)}")
+            return None, None
+
+    @staticmethod
+    def _is_trusted_text(text):
+        chars = [ch for ch in text if not ch.isspace()]
+        if len(chars) < TEXT_LAYER_MIN_CHARS:
+            log.debug(f"Text layer too short: {len(chars)} characters")
+            return False
+
+        devanagari = sum(ord(ch) in DEVANAGARI_BLOCK for ch in chars)
+        ascii_chars = sum(ch.isascii() and ch.isprintable() for ch in chars)
+        valid_ratio = (devanagari + ascii_chars) / len(chars)
+        if valid_ratio < TEXT_LAYER_MIN_VALID_RATIO:
+            log.debug(f"Text layer has unexpected characters: {valid_ratio}")
+            return False
+
+        letters = devanagari + sum(
+            ch.isascii() and ch.isalpha() for ch in chars
+        )
+        devanagari_ratio = devanagari / letters if letters else 0
+        if devanagari_ratio < TEXT_LAYER_MIN_DEVANAGARI_RATIO:
+            log.debug(f"Text layer lacks Devanagari: {devanagari_ratio}")
+            return False
+
+        words = [
+            word for word in text.split() if ord(word[0]) in DEVANAGARI_BLOCK
+        ]
+        broken = sum(
+            ord(word[0]) in DEVANAGARI_DEPENDENT_SIGNS for word in words
+        )
+        broken_ratio = broken / len(words) if words else 0
+        if broken_ratio > TEXT_LAYER_MAX_BROKEN_WORD_RATIO:
+            log.debug(f"Text layer has misordered Devanagari: {broken_ratio}")
+            return False
+
+        return True
+
+    def probe_text_layer(self, pdf, page_num):
+        """
+        Tells whether a page carries an embedded text layer that can be used
+        in place of OCR: enough text, only Devanagari/ASCII characters, and
+        Devanagari that maps to Unicode in logical order.
+        """
+        log.info(f"Probing text layer of page {page_num}")
+        try:
+            page = self._get_page_from_pdf(pdf=pdf, page_num=page_num)
+
+            if page is None:
+                log.error(f"Failed to get page {page_num}")
+                return False
+
+            is_trusted = self._is_trusted_text(page.get_text("text"))
+            log.info(f"Text layer of page {page_num} trusted: {is_trusted}")
+            return is_trusted
+
+        except Exception as e:
+            log.error(f"Error probing text layer of page {page_num}: {str(e)}")
+            return False
+
+    @staticmethod
+    def _words_to_text(words):
+        lines = {}
+        for x0, y0, x1, y1, word, block_no, line_no, _ in words:
+            lines.setdefault((block_no, line_no), []).append((x0, y0, word))
+
+        ordered = sorted(
+            lines.values(),
+            key=lambda line: (min(y for _, y, _ in line), line[0][0]),
+        )
+        return "\n".join(
+            " ".join(word for _, _, word in sorted(line)) for line in ordered
+        )
+
+    def extract_card_text(
+        self, pdf, page_num, card_rect, num_sections=NUM_SECTION
+    ):
+        """
+        Reads the text layer words inside a card rectangle (in PDF points)
+        and returns one text per vertical section of the card, split the
+        same way as ImageProcessor.split_roi_into_sides, with a word going
+        to the section holding its centre.
+        """
+        log.debug(f"Extracting text layer of card {card_rect}")
+        try:
+            page = self._get_page_from_pdf(pdf=pdf, page_num=page_num)
+
+            if page is None:
+                log.error(f"Failed to get page {page_num}")
+                return None
+
+            x0, _, x1, _ = card_rect
+            section_width = (x1 - x0) / num_sections
+            sections = [[] for _ in range(num_sections)]
+            for word in page.get_text("words", clip=fitz.Rect(card_rect)):
+                centre = (word[0] + word[2]) / 2
+                index = int((centre - x0) // section_width)
+                sections[min(max(index, 0), num_sections - 1)].append(word)
+
+            return [self._words_to_text(words) for words in sections]
+
+        except Exception as e:
+            log.error(f"Error extracting text of card {card_rect}: {str(e)}")
+            return None
+
     def get_filename(self):
         filename = get_filename_part(
             self.file_path, FileNamePart.WITHOUT_EXTENSION
@@ -0,0 +1,109 @@
+import os
+import uuid
+import numpy as np
+from pathlib import Path
+from config.settings import (
+    RENDER_CACHE_DIR,
+    RENDER_CACHE_MAX_BYTES,
+    RENDER_CACHE_EVICT_INTERVAL,
+)
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+class RenderCache:
+    """
+    On-disk cache of rendered pages, one .npy file per page render.
+
+    Files are written to a temporary name and renamed into place, so
+    processes sharing the cache never read a partial file, and hits are
+    memory-mapped read-only, so processes reading the same page share one
+    copy through the OS page cache. The least recently used files are
+    evicted once the cache grows past `max_bytes`; since that needs a scan
+    of the cache directory, it runs once every `evict_interval` stores
+    rather than on each one.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = RENDER_CACHE_DIR,
+        max_bytes: int = RENDER_CACHE_MAX_BYTES,
+        evict_interval: int = RENDER_CACHE_EVICT_INTERVAL,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+        self._stores = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _get_path(self, file_hash, page_num, dpi, color_mode, clip=None):
+        name = f"{file_hash}_{page_num}_{dpi}_{color_mode.value}"
+        if clip is not None:
+            name += "_" + "_".join(f"{value:.3f}" for value in clip)
+        return self.cache_dir / f"{name}.npy"
+
+    def get(self, file_hash, page_num, dpi, color_mode, clip=None):
+        path = self._get_path(file_hash, page_num, dpi, color_mode, clip)
+        try:
+            image = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            log.debug(f"Render cache miss: {path.name}")
+            return None
+        except (OSError, ValueError) as e:
+            log.warning(f"Unreadable render cache entry {path.name}: {e}")
+            return None
+
+        # Mark the entry as recently used for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        log.debug(f"Render cache hit: {path.name}")
+        return image
+
+    def put(self, file_hash, page_num, dpi, color_mode, image, clip=None):
+        path = self._get_path(file_hash, page_num, dpi, color_mode, clip)
+        temp_path = path.with_name(f".{uuid.uuid4().hex}.tmp.npy")
+        try:
+            np.save(temp_path, np.ascontiguousarray(image))
+            os.replace(temp_path, path)
+            log.debug(f"Stored render in cache: {path.name}")
+        except OSError as e:
+            log.warning(f"Could not store render {path.name} in cache: {e}")
+            temp_path.unlink(missing_ok=True)
+            return
+
+        self._stores += 1
+        if self._stores % self.evict_interval == 0:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".npy") or entry.name.startswith("."):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_bytes += stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        log.info(
+            f"Render cache holds {total_bytes} bytes, evicting down to "
+            f"{self.max_bytes} bytes"
+        )
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_bytes -= size
+            except OSError:
+                # Removed by another process, or still mapped (Windows)
+                continue
@@ -0,0 +1,252 @@
+import numpy as np
+from src.enums.enums import RenderMode, RoiSource
+from config.config_files.config import ImageProcess
+from config.settings import (
+    IMAGE_DPI,
+    ROI_DETECTION_DPI,
+    ROI_CLIP_MARGIN,
+    PDF_RENDER_MODE,
+    ROI_SOURCE,
+)
+from src.processors.image.preprocessed_image import PreprocessedImage
+from src.utils.utils import pixels_to_points, points_to_pixels
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+class RoiProvider:
+    """
+    Finds the voter cards of a page and returns their bounding boxes in PDF
+    points together with the card images rendered at IMAGE_DPI.
+
+    Cards are read from the page's vector drawings when the PDF has them,
+    and detected on a rendered page (full page or two-pass) otherwise. With
+    a layout template, the card grid detected on the first pages is reused
+    on later pages that pass the template check.
+    """
+
+    def __init__(
+        self,
+        pdf_reader,
+        image_processor,
+        render_mode=RenderMode(PDF_RENDER_MODE),
+        roi_source=RoiSource(ROI_SOURCE),
+        contour_area=ImageProcess.ContourArea,
+        layout_template=None,
+    ):
+        self.pdf_reader = pdf_reader
+        self.image_processor = image_processor
+        self.render_mode = render_mode
+        self.roi_source = roi_source
+        self.contour_area = contour_area
+        self.layout_template = layout_template
+
+    def _filter_vector_rects(self, rects):
+        contour_area = self.contour_area.ImageRoi
+        corners = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+        widths = corners[:, 2] - corners[:, 0]
+        heights = corners[:, 3] - corners[:, 1]
+        areas = widths * heights
+        with np.errstate(divide="ignore", invalid="ignore"):
+            aspect_ratios = widths / heights
+        corners = corners[
+            (widths > 0)
+            & (heights > 0)
+            & (contour_area.MIN_AREA_THRESHOLD < areas)
+            & (areas < contour_area.MAX_AREA_THRESHOLD)
+            & (contour_area.MIN_ASPECT_RATIO < aspect_ratios)
+            & (aspect_ratios < contour_area.MAX_ASPECT_RATIO)
+        ]
+
+        boxes = np.column_stack(
+            (corners[:, :2], corners[:, 2:] - corners[:, :2])
+        )
+        keep = self.image_processor.suppress_duplicate_rects(
+            rects=boxes,
+            position_threshold=contour_area.POSITION_THRESHOLD,
+            size_threshold=contour_area.SIZE_THRESHOLD,
+        )
+        cards = [tuple(rect) for rect in corners[keep].tolist()]
+        log.debug(f"Kept {len(cards)} of {len(rects)} vector rectangles")
+        return cards
+
+    def _refine_roi_clip(self, pdf, page_num, rect):
+        """
+        Re-renders a card rectangle (in PDF points) at IMAGE_DPI, with a
+        margin, and re-detects the card inside the clip so its bounds match
+        a full-page render at IMAGE_DPI.
+        """
+        x0, y0, x1, y1 = rect
+        margin = ROI_CLIP_MARGIN
+        # Snap the clip to the IMAGE_DPI pixel grid of the full page so the
+        # clip pixels line up with the full-page render
+        clip_px = points_to_pixels(
+            (x0 - margin, y0 - margin, x1 + margin, y1 + margin), IMAGE_DPI
+        )
+        clip = pixels_to_points(clip_px, IMAGE_DPI)
+
+        log.debug(f"Rendering card clip {clip} on page {page_num}")
+        clip_image = self.pdf_reader.extract_image_from_pdf(
+            pdf=pdf, page_num=page_num, dpi=IMAGE_DPI, clip=clip
+        )
+        if clip_image is None:
+            return None, None
+        clip_image = PreprocessedImage(clip_image, IMAGE_DPI)
+
+        rects = self.image_processor.extract_roi_rects_from_image(
+            image=clip_image, dpi=IMAGE_DPI
+        )
+        if rects:
+            # Keep the largest rectangle, the card itself
+            rects = [max(rects, key=lambda r: r[2] * r[3])]
+        else:
+            log.warning(
+                f"Card not re-detected in clip on page {page_num}, "
+                "using the given bounds"
+            )
+            x, y, w, h = points_to_pixels(rect, IMAGE_DPI)
+            rects = [(x - clip_px[0], y - clip_px[1], w, h)]
+
+        x, y, w, h = rects[0]
+        card_rect = pixels_to_points(
+            (x + clip_px[0], y + clip_px[1], w, h), IMAGE_DPI
+        )
+        roi_image = self.image_processor.crop_roi_images(
+            image=clip_image, rects=rects
+        )[0]
+        return card_rect, roi_image
+
+    def _render_cards(self, pdf, page_num, rects):
+        log.debug(f"Rendering {len(rects)} card clips at {IMAGE_DPI} DPI")
+        card_rects, roi_images = [], []
+        for rect in rects:
+            card_rect, roi_image = self._refine_roi_clip(
+                pdf=pdf, page_num=page_num, rect=rect
+            )
+            if roi_image is not None:
+                card_rects.append(card_rect)
+                roi_images.append(roi_image)
+        return card_rects, roi_images
+
+    def _render_template_cards(self, pdf, page_num, rects):
+        log.debug(f"Rendering {len(rects)} template cards at {IMAGE_DPI} DPI")
+        card_rects, roi_images = [], []
+        for rect in rects:
+            x, y, w, h = points_to_pixels(rect, IMAGE_DPI)
+            card_rect = pixels_to_points((x, y, w, h), IMAGE_DPI)
+            card_image = self.pdf_reader.extract_image_from_pdf(
+                pdf=pdf, page_num=page_num, dpi=IMAGE_DPI, clip=card_rect
+            )
+            if card_image is None:
+                continue
+            card_image = PreprocessedImage(card_image, IMAGE_DPI)
+            card_rects.append(card_rect)
+            roi_images.append(
+                self.image_processor.crop_roi_images(
+                    image=card_image, rects=[(0, 0, w, h)]
+                )[0]
+            )
+        return card_rects, roi_images
+
+    def _get_rois_from_vectors(self, pdf, page_num):
+        rects = self.pdf_reader.extract_rects_from_drawings(
+            pdf=pdf, page_num=page_num
+        )
+        if not rects:
+            return [], []
+        cards = self._filter_vector_rects(rects)
+        return self._render_cards(pdf=pdf, page_num=page_num, rects=cards)
+
+    def _get_rois_two_pass(self, pdf, page_num):
+        log.debug(f"Rendering page {page_num} at {ROI_DETECTION_DPI} DPI")
+        preview = self.pdf_reader.extract_image_from_pdf(
+            pdf=pdf, page_num=page_num, dpi=ROI_DETECTION_DPI
+        )
+        rects = self.image_processor.extract_roi_rects_from_image(
+            image=preview, dpi=ROI_DETECTION_DPI
+        )
+        if rects is None:
+            return None, None
+
+        rects = [pixels_to_points(rect, ROI_DETECTION_DPI) for rect in rects]
+        return self._render_cards(pdf=pdf, page_num=page_num, rects=rects)
+
+    def _get_rois_full_page(self, pdf, page_num):
+        image = self.pdf_reader.extract_image_from_pdf(
+            pdf=pdf, page_num=page_num
+        )
+        if image is None:
+            return None, None
+
+        # Detection, OCR preparation and photo detection share the page
+        # grayscale and blurred images through the crops
+        image = PreprocessedImage(image, IMAGE_DPI)
+        rects = self.image_processor.extract_roi_rects_from_image(
+            image=image, dpi=IMAGE_DPI
+        )
+        if rects is None:
+            return None, None
+
+        roi_images = self.image_processor.crop_roi_images(
+            image=image, rects=rects
+        )
+        card_rects = [pixels_to_points(rect, IMAGE_DPI) for rect in rects]
+        return card_rects, roi_images
+
+    def _get_rois_from_raster(self, pdf, page_num):
+        template = self.layout_template
+        if (
+            template is not None
+            and template.is_ready
+            and template.verify(pdf=pdf, page_num=page_num)
+        ):
+            return self._render_template_cards(
+                pdf=pdf, page_num=page_num, rects=template.rects
+            )
+
+        if self.render_mode == RenderMode.TWO_PASS:
+            card_rects, roi_images = self._get_rois_two_pass(
+                pdf=pdf, page_num=page_num
+            )
+        else:
+            card_rects, roi_images = self._get_rois_full_page(
+                pdf=pdf, page_num=page_num
+            )
+
+        if template is not None and card_rects:
+            template.learn(card_rects)
+        return card_rects, roi_images
+
+    def get_rois(self, pdf, page_num):
+        """
+        Returns the card rectangles of a page, as (x0, y0, x1, y1) in PDF
+        points, and the matching card images as PreprocessedImage crops
+        sharing the grayscale and blurred intermediates of their render.
+        """
+        log.info(f"Getting ROIs of page {page_num} from {self.roi_source}")
+
+        if self.roi_source in (RoiSource.VECTOR, RoiSource.AUTO):
+            card_rects, roi_images = self._get_rois_from_vectors(
+                pdf=pdf, page_num=page_num
+            )
+            if roi_images or self.roi_source == RoiSource.VECTOR:
+                log.info(
+                    f"Found {len(roi_images)} cards on page {page_num} "
+                    "from vector drawings"
+                )
+                return card_rects, roi_images
+
+            log.info(
+                f"No vector cards on page {page_num}, "
+                "falling back to raster detection"
+            )
+
+        card_rects, roi_images = self._get_rois_from_raster(
+            pdf=pdf, page_num=page_num
+        )
+        log.info(
+            f"Found {len(roi_images) if roi_images else 0} cards on page "
+            f"{page_num} from raster detection"
+        )
+        return card_rects, roi_images
@@ -0,0 +1,161 @@
+import re
+import pandas as pd
+from config.config_loader import load_resource
+from config.settings import (
+    VOTER_ID_PATTERN,
+    OCR_CORRECTIONS_PATH,
+    HIN_ENG_DIGITS_PATH,
+    FIELD_LABELS_PATH,
+    USE_LABEL_RESOLVER,
+)
+from src.processors.text.correction_engine import CorrectionEngine
+from src.processors.text.text_pipeline import TextPipeline
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+# Joins the card halves into one string for the replacements that cannot
+# match across it, OCR text never contains it
+TEXT_SEPARATOR = "\x00"
+
+
+class BatchTextProcessor:
+    """
+    Card text post-processing of many cards at once, as column operations
+    over the OCR text of every card half of a page or a whole PDF.
+
+    The halves are laid out in one column (left then right of each card).
+    Corrections and ":" normalization run once over the whole column
+    joined by TEXT_SEPARATOR, which none of them can match across; gender/
+    age reformatting (whose pattern would run into the next half), line
+    splitting, field extraction and digit conversion run over the column
+    with pandas string methods. The
+    fields come out as a long table (card, key, value) in reading order;
+    turning it into records follows dict semantics (a repeated key keeps
+    its first position and its last value) and standardizes the keys, so
+    every record matches TextPipeline.format_card of the same card.
+    """
+
+    def __init__(
+        self,
+        corrections_path=OCR_CORRECTIONS_PATH,
+        digits_path=HIN_ENG_DIGITS_PATH,
+        labels_path=FIELD_LABELS_PATH if USE_LABEL_RESOLVER else None,
+    ):
+        self.corrections_path = corrections_path
+        self.digits_path = digits_path
+        self.pipeline = TextPipeline(
+            corrections_path=corrections_path,
+            digits_path=digits_path,
+            labels_path=labels_path,
+        )
+        self._whitespace = re.compile(r"\s+")
+
+    @staticmethod
+    def _replace_joined(texts, replace):
+        """
+        Applies `replace` to all the texts at once, joined by
+        TEXT_SEPARATOR, or one by one when a text contains it.
+        """
+        joined = TEXT_SEPARATOR.join(texts)
+        if joined.count(TEXT_SEPARATOR) != len(texts) - 1:
+            return [replace(text) for text in texts]
+        return replace(joined).split(TEXT_SEPARATOR)
+
+    def _normalize(self, texts):
+        engine = CorrectionEngine.from_file(self.corrections_path)
+        texts = self._replace_joined(texts, engine.correct)
+        texts = pd.Series(texts, dtype=object).str.replace(
+            self.pipeline.gender_age_pattern,
+            self.pipeline.gender_age_replacement,
+            regex=True,
+        )
+        return pd.Series(
+            self._replace_joined(
+                texts.tolist(),
+                lambda text: text.replace(" : ", ":")
+                .replace(": ", ":")
+                .replace("::", ":"),
+            ),
+            dtype=object,
+        )
+
+    def extract_fields(self, left_texts, right_texts):
+        """
+        Returns the fields read from the OCR text of every card, as a
+        table with a row per field line: card index, key and value.
+        Missing halves read as no text.
+        """
+        texts = [""] * (2 * len(left_texts))
+        texts[::2] = [text or "" for text in left_texts]
+        texts[1::2] = [text or "" for text in right_texts]
+        texts = self._normalize(texts)
+
+        lines = texts.str.split("\n").explode()
+        lines = pd.DataFrame(
+            {
+                "card": lines.index // 2,
+                "line": lines.str.strip().to_numpy(dtype=object),
+            }
+        )
+        lines = lines[lines["line"] != ""]
+
+        digits = load_resource(
+            filePath=self.digits_path, build=str.maketrans
+        )
+        has_colon = lines["line"].str.contains(":", regex=False)
+
+        parts = lines.loc[has_colon, "line"].str.split(":")
+        keys = parts.str[0].str.strip().str.translate(digits)
+        values = parts.str[1].str.strip().str.translate(digits)
+
+        compact = lines.loc[~has_colon, "line"].str.replace(
+            self._whitespace, "", regex=True
+        )
+        voter_ids = compact[compact.str.match(VOTER_ID_PATTERN)]
+
+        # The line index is the reading order, restored after the two
+        # kinds of field lines are put back together
+        fields = pd.concat(
+            [
+                pd.DataFrame(
+                    {
+                        "card": lines.loc[keys.index, "card"],
+                        "key": keys,
+                        "value": values,
+                    }
+                ),
+                pd.DataFrame(
+                    {
+                        "card": lines.loc[voter_ids.index, "card"],
+                        "key": "voter_id",
+                        "value": voter_ids.str.translate(digits),
+                    }
+                ),
+            ]
+        ).sort_index(kind="stable")
+        log.debug(f"Extracted {len(fields)} fields of {len(texts)} halves")
+        return fields
+
+    def to_records(self, fields, num_cards):
+        """
+        Returns the standardized field dict of every card from the table
+        of extract_fields, with None for an empty key or value.
+        """
+        records = [{} for _ in range(num_cards)]
+        for card, key, value in fields.itertuples(index=False, name=None):
+            records[card][key or None] = value or None
+        return [
+            self.pipeline.standardize_fields(record) for record in records
+        ]
+
+    def format_cards(self, left_texts, right_texts):
+        """
+        Returns the field dict of every card, as TextPipeline.format_card
+        of each (left_text, right_text).
+        """
+        log.info(f"Batch formatting text of {len(left_texts)} cards")
+        fields = self.extract_fields(left_texts, right_texts)
+        records = self.to_records(fields, num_cards=len(left_texts))
+        log.info(f"Batch formatting completed with {len(fields)} fields")
+        return records
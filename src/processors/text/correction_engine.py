@@ -0,0 +1,40 @@
+from config.config_loader import load_resource
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+class CorrectionEngine:
+    """
+    OCR corrections ({correct word: [misspellings]}) applied by replacing
+    every misspelling one after the other in file order.
+
+    Later rules see the effect of earlier ones (in the shipped file "उप"
+    rewrites part of "उप्र"), and str.replace is faster on card-sized
+    text than a regex alternation with a per-match callback, so the rules
+    are kept as a flat list. The list is built once per process, through
+    the config resource cache, and again only when the file's mtime
+    changes, instead of reloading the file per call.
+    """
+
+    def __init__(self, corrections):
+        self.rules = [
+            (variant, key)
+            for key, variants in corrections.items()
+            for variant in variants
+            if variant
+        ]
+        log.info(f"Loaded {len(self.rules)} OCR corrections")
+
+    def correct(self, text):
+        for variant, key in self.rules:
+            text = text.replace(variant, key)
+        return text
+
+    @classmethod
+    def from_file(cls, file_path):
+        """
+        Returns the engine of a corrections file, built once per process
+        and again only when the file's mtime changes.
+        """
+        return load_resource(filePath=file_path, build=cls)
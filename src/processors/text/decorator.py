@@ -1,6 +1,7 @@
-from config.config_loader import load_json
+from config.config_loader import load_resource
 import re
 from src.utils.logger import setup_logger
+from src.processors.text.correction_engine import CorrectionEngine
 from functools import wraps
 from config.settings import (
     VOTER_NAME_FIELD_DETECT_PATTERN,
@@ -23,12 +24,7 @@ def correct_misspelled_word(filePath):
                 f"Starting word correction for data: {data[:100]}..."
             )  # Log first 100 chars
 
-            ocr_corrections = load_json(filePath=filePath)
-            log.debug(f"Loaded {len(ocr_corrections)} correction patterns")
-
-            for key, val in ocr_corrections.items():
-                for item in val:
-                    data = data.replace(item, key)
+            data = CorrectionEngine.from_file(filePath).correct(data)
 
             log.debug("Word corrections applied")
             return func(data, *args, **kwargs)
@@ -74,14 +70,13 @@ def hindi_to_english_digits(filePath):
                 f"Starting digit conversion for data: {data[:100]}..."
             )  # Log first 100 chars
 
-            hindi_to_english_digits = load_json(filePath=filePath)
-            log.debug(f"Loaded {len(hindi_to_english_digits)} digit mappings")
+            digits_table = load_resource(
+                filePath=filePath, build=str.maketrans
+            )
             for row in data:
                 for idx, element in enumerate(row):
                     # Convert Hindi digits to English digits for each element and update in-place
-                    row[idx] = ''.join(
-                        hindi_to_english_digits.get(ch, ch) for ch in element
-                    )
+                    row[idx] = element.translate(digits_table)
             # data = ''.join(hindi_to_english_digits.get(ch, ch) for ch in data)
             log.debug("Digit conversion completed")
 
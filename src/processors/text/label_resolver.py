@@ -0,0 +1,166 @@
+from functools import lru_cache
+from config.config_loader import load_resource
+from config.settings import (
+    LABEL_MAX_DISTANCE_RATIO,
+    LABEL_RESOLVER_CACHE_SIZE,
+)
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+def edit_distance(first, second):
+    """
+    Levenshtein distance between two strings, in code points.
+    """
+    if len(first) < len(second):
+        first, second = second, first
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, start=1):
+        current = [row]
+        for column, second_char in enumerate(second, start=1):
+            current.append(
+                min(
+                    previous[column] + 1,
+                    current[column - 1] + 1,
+                    previous[column - 1] + (first_char != second_char),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+class BkTree:
+    """
+    Burkhard-Keller tree of strings under edit distance. A query with
+    tolerance `max_distance` only descends into the children whose edge
+    distance is within `max_distance` of the query's distance to the node
+    (triangle inequality), instead of scoring every string.
+    """
+
+    def __init__(self, words=()):
+        self.root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, word, max_distance):
+        """
+        Returns (distance, word) of every string within `max_distance` of
+        `word`.
+        """
+        matches = []
+        nodes = [self.root] if self.root is not None else []
+        while nodes:
+            node_word, children = nodes.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= max_distance:
+                matches.append((distance, node_word))
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    nodes.append(child)
+        return matches
+
+
+class LabelResolver:
+    """
+    Maps OCR'd field labels to their canonical field key, from the known
+    Hindi and English labels of each field in field_labels.json.
+
+    Exact labels (after case and whitespace folding) are a dict lookup.
+    Others are looked up in a BK-tree of all known labels, allowing an
+    edit distance of `max_distance_ratio` of the label length, and
+    resolve to the field of the closest label; a label with no match or
+    equally close labels of different fields is kept as read. Results
+    are memoized, so labels repeated on every card cost one lookup.
+    """
+
+    def __init__(
+        self,
+        labels,
+        max_distance_ratio=LABEL_MAX_DISTANCE_RATIO,
+        cache_size=LABEL_RESOLVER_CACHE_SIZE,
+    ):
+        self.max_distance_ratio = max_distance_ratio
+        self._fields = {}
+        for field, field_labels in labels.items():
+            for label in [field, *field_labels]:
+                self._fields[self._fold(label)] = field
+        self._index = BkTree(self._fields)
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+        log.info(
+            f"Indexed {len(self._fields)} labels of {len(labels)} fields"
+        )
+
+    @staticmethod
+    def _fold(label):
+        return " ".join(label.split()).casefold()
+
+    def _resolve(self, label):
+        """
+        Returns the canonical field key of an OCR'd label, or the label
+        itself when it matches no known field.
+        """
+        if not isinstance(label, str):
+            return label
+        folded = self._fold(label)
+        field = self._fields.get(folded)
+        if field is not None:
+            return field
+
+        max_distance = int(len(folded) * self.max_distance_ratio)
+        if not max_distance:
+            return label
+        matches = self._index.search(folded, max_distance)
+        if not matches:
+            return label
+
+        best = min(distance for distance, _ in matches)
+        fields = {
+            self._fields[word]
+            for distance, word in matches
+            if distance == best
+        }
+        if len(fields) > 1:
+            log.debug(f"Label {label} is ambiguous between {fields}")
+            return label
+        field = fields.pop()
+        log.debug(f"Resolved label {label} to {field}")
+        return field
+
+    def resolve_keys(self, user_dict):
+        """
+        Returns the field dict with every key resolved. A key resolving to
+        a field already read keeps the first position and the last value,
+        as when the card was parsed.
+        """
+        resolved = [
+            (self.resolve(key), value) for key, value in user_dict.items()
+        ]
+        if all(
+            new_key == key for (new_key, _), key in zip(resolved, user_dict)
+        ):
+            return user_dict
+        return dict(resolved)
+
+    @classmethod
+    def from_file(cls, labels_path):
+        """
+        Returns the resolver of a labels file, built once per process and
+        again only when the file's mtime changes.
+        """
+        return load_resource(filePath=labels_path, build=cls)
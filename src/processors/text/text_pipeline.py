@@ -0,0 +1,190 @@
+import re
+from config.config_loader import load_resource
+from config.settings import (
+    VOTER_ID_PATTERN,
+    GENDER_AGE_PATTERN,
+    VOTER_NAME_FIELD_DETECT_PATTERN,
+    MAKAN_NUMBER_FIELD_DETECT_PATTERN,
+    OCR_CORRECTIONS_PATH,
+    HIN_ENG_DIGITS_PATH,
+    FIELD_LABELS_PATH,
+    USE_LABEL_RESOLVER,
+)
+from src.processors.text.correction_engine import CorrectionEngine
+from src.processors.text.label_resolver import LabelResolver
+from src.utils.logger import setup_logger
+
+log = setup_logger(__name__)
+
+
+VOTER_NAME_KEY = "निर्वाचक का नाम"
+RELATION_NAME_KEYS = {
+    "पिता": "पिता का नाम",
+    "पति": "पति का नाम",
+    "माता": "माता का नाम",
+    "पत्नी": "पत्नी का नाम",
+}
+DEFAULT_RELATION_NAME_KEY = "पिता/पति का नाम"
+MAKAN_NUMBER_KEY = "मकान संख्या"
+
+
+class TextPipeline:
+    """
+    The card text post-processing of the TextProcessor decorator stack
+    fused into one function per step, with the same output.
+
+    Corrections, gender/age reformatting and separator normalization run
+    on the whole text (the gender/age pattern may span lines), then a
+    single pass over the lines drops empty ones, extracts the fields,
+    converts digits and builds the field dict. The patterns are compiled
+    and the corrections and digit table loaded once per process, and
+    reloaded when their files change.
+
+    With `labels_path`, keys are resolved to their field by a
+    LabelResolver before they are standardized.
+    """
+
+    def __init__(
+        self,
+        corrections_path=OCR_CORRECTIONS_PATH,
+        digits_path=HIN_ENG_DIGITS_PATH,
+        labels_path=FIELD_LABELS_PATH if USE_LABEL_RESOLVER else None,
+    ):
+        self.corrections_path = corrections_path
+        self.digits_path = digits_path
+        self.labels_path = labels_path
+        self._voter_id = re.compile(VOTER_ID_PATTERN)
+        self.gender_age_pattern = re.compile(GENDER_AGE_PATTERN)
+        self._voter_name = re.compile(VOTER_NAME_FIELD_DETECT_PATTERN)
+        self._makan_number = re.compile(MAKAN_NUMBER_FIELD_DETECT_PATTERN)
+
+    @staticmethod
+    def gender_age_replacement(match):
+        if match.group(1):
+            return f"उम्र:{match.group(2)}\nलिंग:{match.group(4)}"
+        elif match.group(5):
+            return f"उम्र:{match.group(6)}\nलिंग:{match.group(8)}"
+        return match.group(0)
+
+    def normalize(self, roi_data):
+        """
+        Returns the corrected text of a card half with gender/age on their
+        own lines and ":" separators without spaces.
+        """
+        text = CorrectionEngine.from_file(self.corrections_path).correct(
+            roi_data
+        )
+        text = self.gender_age_pattern.sub(self.gender_age_replacement, text)
+        return text.replace(" : ", ":").replace(": ", ":").replace("::", ":")
+
+    def format_text(self, roi_data):
+        """
+        Returns the field dict of the OCR text of a card half, as
+        TextProcessor.format_text.
+        """
+        text = self.normalize(roi_data)
+        try:
+            digits = load_resource(
+                filePath=self.digits_path, build=str.maketrans
+            )
+            user_dict = {}
+            for line in text.split("\n"):
+                line = line.strip()
+                if not line:
+                    continue
+
+                if ":" in line:
+                    item = [
+                        part.strip().translate(digits)
+                        for part in line.split(":")
+                    ]
+                else:
+                    line = "".join(line.split())
+                    if not self._voter_id.match(line):
+                        continue
+                    item = ["voter_id", line.translate(digits)]
+
+                key = item[0] or None
+                user_dict[key] = item[1] if len(item) > 1 and item[1] else None
+            return user_dict
+
+        except Exception as e:
+            log.error(f"Error during text formatting: {e}")
+            return {}
+
+    def _get_standardized_field(self, field_name, order):
+        voter_name_match = self._voter_name.match(field_name)
+        if voter_name_match:
+            if order == 1:
+                return VOTER_NAME_KEY
+            elif order == 2:
+                first_word = voter_name_match.group(1).strip()
+                return RELATION_NAME_KEYS.get(
+                    first_word, DEFAULT_RELATION_NAME_KEY
+                )
+            return field_name
+        elif self._makan_number.match(field_name):
+            return MAKAN_NUMBER_KEY
+        return field_name
+
+    def standardize_fields(self, user_dict):
+        """
+        Renames the first three fields of a card to their standard keys,
+        as TextProcessor.standardize_field_name, after resolving the keys
+        with the label resolver.
+        """
+        if not isinstance(user_dict, dict) or not user_dict:
+            return user_dict
+
+        if self.labels_path is not None:
+            resolver = LabelResolver.from_file(self.labels_path)
+            user_dict = resolver.resolve_keys(user_dict)
+
+        keys = list(user_dict)[:3]
+        renames = {}
+        for order, key in enumerate(keys, start=1):
+            if not isinstance(key, str):
+                continue
+            standardized_key = self._get_standardized_field(key, order)
+            if standardized_key != key:
+                renames[key] = standardized_key
+
+        if not renames:
+            return user_dict
+
+        new_keys = list(renames.values())
+        if len(set(new_keys)) == len(new_keys) and not any(
+            new_key in user_dict for new_key in new_keys
+        ):
+            return {renames.get(k, k): v for k, v in user_dict.items()}
+
+        # A new key collides with another field: renaming merges them and
+        # shifts the next positions, so rename one position at a time
+        return self._standardize_sequentially(user_dict)
+
+    def _standardize_sequentially(self, user_dict):
+        for index in range(3):
+            items = list(user_dict.items())
+            if index >= len(items):
+                break
+            key, _ = items[index]
+            if not isinstance(key, str):
+                continue
+            standardized_key = self._get_standardized_field(key, index + 1)
+            if key == standardized_key:
+                continue
+            user_dict = {
+                k if i != index else standardized_key: v
+                for i, (k, v) in enumerate(items)
+            }
+        return user_dict
+
+    def format_card(self, left_text, right_text):
+        """
+        Returns the field dict of a card from the OCR text of its halves.
+        """
+        user_dict = {
+            **self.format_text(left_text),
+            **self.format_text(right_text),
+        }
+        return self.standardize_fields(user_dict)
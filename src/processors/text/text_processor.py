@@ -7,15 +7,19 @@ from src.processors.text.decorator import (
     clean_empty_lines,
     standardize_name_fields,
 )
+from src.processors.text.text_pipeline import TextPipeline
 from config.settings import (
     VOTER_ID_PATTERN,
     OCR_CORRECTIONS_PATH,
     HIN_ENG_DIGITS_PATH,
+    USE_FUSED_TEXT_PIPELINE,
 )
 from src.utils.logger import setup_logger
 
 log = setup_logger(__name__)
 
+_text_pipeline = TextPipeline()
+
 
 class TextProcessor:
     def __init__(self):
@@ -88,8 +92,20 @@ class TextProcessor:
         return user_dict
 
     @staticmethod
-    @standardize_name_fields
     def standardize_field_name(user_dict):
+        if USE_FUSED_TEXT_PIPELINE:
+            return _text_pipeline.standardize_fields(user_dict)
+        return TextProcessor._standardize_field_name_stacked(user_dict)
+
+    @staticmethod
+    def format_text(roi_data):
+        if USE_FUSED_TEXT_PIPELINE:
+            return _text_pipeline.format_text(roi_data)
+        return TextProcessor._format_text_stacked(roi_data)
+
+    @staticmethod
+    @standardize_name_fields
+    def _standardize_field_name_stacked(user_dict):
         return user_dict
 
     @staticmethod
@@ -97,7 +113,7 @@ class TextProcessor:
     @format_gender_age
     @normalize_text
     @clean_empty_lines
-    def format_text(roi_data):
+    def _format_text_stacked(roi_data):
         try:
             log.info("Starting text formatting")
             log.debug(
@@ -1,6 +1,9 @@
 import os
+import math
+import hashlib
 from pathlib import Path
 from src.enums.enums import FileNamePart
+from config.settings import POINTS_PER_INCH
 from src.utils.logger import setup_logger
 
 log = setup_logger(__name__)
@@ -63,3 +66,37 @@ def make_dir(path: Path):
             log.info(f"Directory already exists: {path}")
     except Exception as e:
         log.error(f"Error creating directory: {e}")
+
+
+def pixels_to_points(rect, dpi):
+    """
+    Converts an (x, y, w, h) pixel rectangle of a page rendered at `dpi`
+    into an (x0, y0, x1, y1) rectangle in PDF points.
+    """
+    x, y, w, h = rect
+    scale = POINTS_PER_INCH / dpi
+    return (x * scale, y * scale, (x + w) * scale, (y + h) * scale)
+
+
+def points_to_pixels(rect, dpi):
+    """
+    Converts an (x0, y0, x1, y1) rectangle in PDF points into the smallest
+    (x, y, w, h) pixel rectangle covering it on a page rendered at `dpi`.
+    """
+    x0, y0, x1, y1 = rect
+    scale = dpi / POINTS_PER_INCH
+    px0, py0 = math.floor(x0 * scale), math.floor(y0 * scale)
+    px1, py1 = math.ceil(x1 * scale), math.ceil(y1 * scale)
+    return (px0, py0, px1 - px0, py1 - py0)
+
+
+def get_file_digest(path: Path, chunk_size: int = 1024 * 1024):
+    """
+    Returns the SHA-256 hex digest of a file's content, read in chunks.
+    """
+    log.info(f"Hashing file content: {path}")
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
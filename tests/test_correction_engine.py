@@ -0,0 +1,33 @@
+import json
+import os
+from config.settings import OCR_CORRECTIONS_PATH
+from src.processors.text.correction_engine import CorrectionEngine
+
+
+def write_corrections(path, corrections, mtime_ns):
+    path.write_text(json.dumps(corrections), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_engine_is_loaded_once():
+    engine = CorrectionEngine.from_file(OCR_CORRECTIONS_PATH)
+    assert CorrectionEngine.from_file(OCR_CORRECTIONS_PATH) is engine
+
+
+def test_engine_is_reloaded_when_file_changes(tmp_path):
+    path = tmp_path / "corrections.json"
+    write_corrections(path, {"नाम": ["नाप"]}, mtime_ns=10**18)
+    engine = CorrectionEngine.from_file(path)
+    assert engine.correct("नाप") == "नाम"
+
+    write_corrections(path, {"उम्र": ["उम्र्र"]}, mtime_ns=2 * 10**18)
+    reloaded = CorrectionEngine.from_file(path)
+    assert reloaded is not engine
+    assert reloaded.correct("नाप उम्र्र") == "नाप उम्र"
+    assert CorrectionEngine.from_file(path) is reloaded
+
+
+def test_rules_apply_in_file_order(tmp_path):
+    path = tmp_path / "corrections.json"
+    write_corrections(path, {"x": ["a"], "y": ["xb"]}, mtime_ns=10**18)
+    assert CorrectionEngine.from_file(path).correct("ab") == "y"
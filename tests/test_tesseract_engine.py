@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+tesserocr = pytest.importorskip("tesserocr")
+
+from src.processors.ocr import tesseract_engine
+from src.processors.ocr.tesseract_engine import TesseractEngine
+
+WHITELIST = "tessedit_char_whitelist"
+
+
+class FakeApi:
+    """
+    Tesseract handle keeping its variables across Clear(), as the real one
+    does, and "reading" the whitelist it is set to.
+    """
+
+    def __init__(self, lang, oem=None):
+        self.variables = {WHITELIST: ""}
+
+    def Clear(self):
+        pass
+
+    def SetPageSegMode(self, psm):
+        pass
+
+    def GetVariableAsString(self, name):
+        return self.variables.get(name)
+
+    def SetVariable(self, name, value):
+        self.variables[name] = value
+        return True
+
+    def SetImageBytes(self, *args):
+        pass
+
+    def SetSourceResolution(self, dpi):
+        pass
+
+    def GetUTF8Text(self):
+        return self.variables[WHITELIST]
+
+    def End(self):
+        pass
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(tesserocr, "PyTessBaseAPI", FakeApi)
+    TesseractEngine.close()
+    yield TesseractEngine()
+    TesseractEngine.close()
+
+
+def test_whitelist_does_not_leak_to_next_read(engine):
+    image = np.zeros((8, 8), dtype=np.uint8)
+    config = "--psm 7 -c tessedit_char_whitelist=0123456789"
+
+    assert engine.image_to_string(image, config, "hin+eng") == "0123456789"
+    assert engine.image_to_string(image, "--psm 3", "hin+eng") == ""
+    assert len(tesseract_engine._local.apis) == 1